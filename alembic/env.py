@@ -20,6 +20,11 @@ if config.config_file_name is not None:
 from models import Base
 target_metadata = Base.metadata
 
+# Migrate whatever the app is pointed at (Postgres, or a SQLite file in
+# embedded mode) rather than the URL in alembic.ini
+from database import DATABASE_URL
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -44,6 +49,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
     )
 
     with context.begin_transaction():
@@ -64,8 +70,10 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # Batch mode lets SQLite run ALTERs it has no syntax for by copying
+        # the table; on Postgres the same ops are plain ALTER TABLEs
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, render_as_batch=True
         )
 
         with context.begin_transaction():
@@ -0,0 +1,31 @@
+"""add city_normalized to theaters
+
+Revision ID: 5c9e0d3b7f21
+Revises: 8b2d4e6f1a93
+Create Date: 2026-10-17 11:48:02.907316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c9e0d3b7f21'
+down_revision: Union[str, None] = '8b2d4e6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('theaters', sa.Column('city_normalized', sa.String(), nullable=True))
+    op.execute("UPDATE theaters SET city_normalized = lower(trim(city)) WHERE city IS NOT NULL")
+    op.create_index(op.f('ix_theaters_city_normalized'), 'theaters', ['city_normalized'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_theaters_city_normalized'), table_name='theaters')
+    op.drop_column('theaters', 'city_normalized')
@@ -0,0 +1,37 @@
+"""add seat votes table
+
+Revision ID: 8b2d4e6f1a93
+Revises: 3f1a7c2e9b04
+Create Date: 2026-10-17 10:03:27.554810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d4e6f1a93'
+down_revision: Union[str, None] = '3f1a7c2e9b04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('seat_votes',
+    sa.Column('screen_id', sa.Integer(), nullable=False),
+    sa.Column('seat', sa.String(), nullable=False),
+    sa.Column('votes', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('last_notes', sa.String(), nullable=True),
+    sa.Column('last_voted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['screen_id'], ['screens.id'], ),
+    sa.PrimaryKeyConstraint('screen_id', 'seat')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('seat_votes')
@@ -26,7 +26,7 @@ def upgrade() -> None:
     sa.Column('screen_id', sa.Integer(), nullable=False),
     sa.Column('suggested_seat', sa.String(), nullable=False),
     sa.Column('user_notes', sa.String(), nullable=True),
-    sa.Column('timestamp', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), server_default=sa.func.now(), nullable=True),
     sa.ForeignKeyConstraint(['screen_id'], ['screens.id'], ),
     sa.PrimaryKeyConstraint('id')
     )
@@ -0,0 +1,32 @@
+"""add osm sync columns to theaters
+
+Revision ID: a4f82c61d0e5
+Revises: 5c9e0d3b7f21
+Create Date: 2026-10-17 13:21:55.140873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f82c61d0e5'
+down_revision: Union[str, None] = '5c9e0d3b7f21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('theaters', sa.Column('osm_version', sa.Integer(), nullable=True))
+    op.add_column('theaters', sa.Column('content_hash', sa.String(), nullable=True))
+    op.add_column('theaters', sa.Column('missing_since', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('theaters', 'missing_since')
+    op.drop_column('theaters', 'content_hash')
+    op.drop_column('theaters', 'osm_version')
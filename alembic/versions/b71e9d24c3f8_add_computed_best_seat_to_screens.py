@@ -0,0 +1,28 @@
+"""add computed_best_seat to screens
+
+Revision ID: b71e9d24c3f8
+Revises: a4f82c61d0e5
+Create Date: 2026-10-17 14:05:13.662091
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e9d24c3f8'
+down_revision: Union[str, None] = 'a4f82c61d0e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('screens', sa.Column('computed_best_seat', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('screens', 'computed_best_seat')
@@ -25,7 +25,8 @@ def upgrade() -> None:
     op.add_column('screens', sa.Column('is_imax', sa.Boolean(), nullable=True))
     op.add_column('screens', sa.Column('best_seat', sa.String(), nullable=True))
     op.add_column('screens', sa.Column('notes', sa.String(), nullable=True))
-    op.alter_column('theaters', 'osm_id',
+    with op.batch_alter_table('theaters') as batch_op:
+        batch_op.alter_column('osm_id',
                existing_type=sa.BIGINT(),
                nullable=True)
     # ### end Alembic commands ###
@@ -34,7 +35,8 @@ def upgrade() -> None:
 def downgrade() -> None:
     """Downgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column('theaters', 'osm_id',
+    with op.batch_alter_table('theaters') as batch_op:
+        batch_op.alter_column('osm_id',
                existing_type=sa.BIGINT(),
                nullable=False)
     op.drop_column('screens', 'notes')
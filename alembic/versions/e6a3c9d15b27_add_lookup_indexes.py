@@ -0,0 +1,38 @@
+"""add lookup indexes
+
+Revision ID: e6a3c9d15b27
+Revises: b71e9d24c3f8
+Create Date: 2026-10-17 16:22:41.518304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a3c9d15b27'
+down_revision: Union[str, None] = 'b71e9d24c3f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY so the live tables stay writable while the indexes build;
+    # it can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_screens_theater_id_screen_number', 'screens', ['theater_id', 'screen_number'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_best_seat_suggestions_screen_id_timestamp', 'best_seat_suggestions', ['screen_id', 'timestamp'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_seat_votes_screen_id_score', 'seat_votes', ['screen_id', sa.text('score DESC'), sa.text('last_voted_at DESC')], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_theaters_city'), 'theaters', ['city'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_theaters_city'), table_name='theaters', postgresql_concurrently=True)
+        op.drop_index('ix_seat_votes_screen_id_score', table_name='seat_votes', postgresql_concurrently=True)
+        op.drop_index('ix_best_seat_suggestions_screen_id_timestamp', table_name='best_seat_suggestions', postgresql_concurrently=True)
+        op.drop_index('ix_screens_theater_id_screen_number', table_name='screens', postgresql_concurrently=True)
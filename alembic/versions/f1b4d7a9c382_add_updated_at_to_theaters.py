@@ -0,0 +1,33 @@
+"""add updated_at to theaters
+
+Revision ID: f1b4d7a9c382
+Revises: e6a3c9d15b27
+Create Date: 2026-10-17 17:40:19.204716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b4d7a9c382'
+down_revision: Union[str, None] = 'e6a3c9d15b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite can't ADD COLUMN with a non-constant default; batch mode copies the table there
+    with op.batch_alter_table('theaters') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_theaters_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('theaters') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_theaters_updated_at'))
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import distinct, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only
+from cache import catalog_cache
+from database import get_async_sessionmaker, reads_from_primary
+from http_cache import CatalogRoute
+from models import Theater, Screen, SeatVote
+from projections import BEST_SEAT, BEST_SEAT_VOTE, SCREEN, THEATER_DETAIL, THEATER_SCREEN, StructResponse
+
+# Async versions of the single-object read endpoints. main.py mounts this
+# router ahead of its own routes when ASYNC_READS=1; the ":int" converters let
+# literal paths such as /theaters/nearby fall through to the sync routes.
+router = APIRouter(route_class=CatalogRoute)
+
+async def get_async_db(request: Request):
+    # Same routing as main.get_read_db: the replica unless this client just wrote
+    primary = reads_from_primary(request)
+    async with get_async_sessionmaker(read=not primary)() as db:
+        db.info["read_your_writes"] = primary
+        yield db
+
+async def cached(db, key, load):
+    # Read-your-writes requests skip the replica-filled cache (see main.cached)
+    if db.info["read_your_writes"]:
+        return await load()
+    return await catalog_cache.get_or_load_async(key, load)
+
+@router.get("/cities")
+async def get_cities(db: AsyncSession = Depends(get_async_db)):
+    # Shares the catalog cache with the sync routes (without miss coalescing)
+    async def load():
+        return list(await db.scalars(
+            select(distinct(Theater.city)).where(Theater.city.isnot(None), Theater.missing_since.is_(None))
+        ))
+    return StructResponse(await cached(db, ("cities",), load))
+
+@router.get("/theaters/{theater_id:int}")
+async def get_theater(theater_id: int, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        theater = (await db.execute(
+            select(Theater)
+            .options(
+                load_only(*THEATER_DETAIL.columns()),
+                joinedload(Theater.screens).load_only(*THEATER_SCREEN.columns()),
+            )
+            .where(Theater.id == theater_id)
+        )).unique().scalar_one_or_none()
+        if not theater:
+            raise HTTPException(status_code=404, detail="Theater not found")
+        return THEATER_DETAIL.serialize(theater)
+    return StructResponse(await cached(db, ("theater", theater_id), load))
+
+@router.get("/screens/{screen_id:int}")
+async def get_screen(screen_id: int, db: AsyncSession = Depends(get_async_db)):
+    screen = (await db.execute(select(*SCREEN.columns()).where(Screen.id == screen_id))).first()
+    if not screen:
+        raise HTTPException(status_code=404, detail="Screen not found")
+    return StructResponse(SCREEN.serialize(screen))
+
+@router.get("/screens/{screen_id:int}/best_seat")
+async def get_best_seat_suggestion(screen_id: int, db: AsyncSession = Depends(get_async_db)):
+    best = (await db.execute(
+        select(*BEST_SEAT.columns())
+        .outerjoin(SeatVote, BEST_SEAT_VOTE)
+        .where(Screen.id == screen_id)
+    )).first()
+
+    if not best or not (best.best_seat or best.computed_best_seat):
+        raise HTTPException(status_code=404, detail="No best seat suggestions found for this screen")
+    return StructResponse(BEST_SEAT.serialize(best))
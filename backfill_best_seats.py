@@ -0,0 +1,25 @@
+import os
+from dotenv import load_dotenv
+from sqlalchemy.orm import sessionmaker
+from consensus import rebuild_tallies
+from database import create_db_engine
+from catalog import bump_catalog_version
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise RuntimeError("DATABASE_URL environment variable not set. Please check your .env file.")
+
+engine = create_db_engine(DATABASE_URL)
+Session = sessionmaker(bind=engine)
+session = Session()
+
+# Rebuild seat_votes and Screen.best_seat from every historical suggestion
+tallied = rebuild_tallies(session)
+print(f"Rebuilt {tallied} seat tallies")
+
+bump_catalog_version(session)
+
+session.commit()
+session.close()
@@ -0,0 +1,167 @@
+"""Query-plan regression check: issues one request per route in main.py (the
+load_test scenarios) against a seeded database, captures every SQL statement
+the route runs and EXPLAINs it. Exits 1 if any statement plans a full scan of
+a table holding more than --max-scan-rows rows.
+
+Seed first so the planner sees realistic table sizes, e.g.
+
+    python -m benchmarks.generate_catalog --theaters 20000 --suggestions 1000000 --reset
+    python -m benchmarks.explain_plans --max-scan-rows 5000
+
+Postgres plans come from EXPLAIN (FORMAT JSON) after an ANALYZE; SQLite
+plans from EXPLAIN QUERY PLAN. Run without ASYNC_READS so every statement
+goes through the psycopg2/sqlite engine. Plans come from the read engine
+(DATABASE_READ_URL, if set), where the GET routes run.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import httpx
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from benchmarks.load_test import ENDPOINTS, sample_catalog
+from database import read_engine as engine
+from models import Base
+
+# Full scans that are the point of the route rather than a missing index
+EXPECTED_SCANS = {
+    ("cities", "theaters"),  # SELECT DISTINCT city over the whole catalog
+    ("theaters_nearby", "theaters"),  # first request builds the spatial index
+    ("search", "theaters"),  # first request builds the search index
+    ("export", "theaters"),
+    ("export", "screens"),
+}
+
+_captured = None
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    if _captured is not None:
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        _captured.append((statement, parameters))
+
+def table_sizes():
+    with engine.connect() as conn:
+        return {
+            table.name: conn.scalar(select(func.count()).select_from(table))
+            for table in Base.metadata.sorted_tables
+        }
+
+def full_scans(cursor, dialect, statement, parameters):
+    # (table, detail) for every full table scan in the statement's plan
+    if dialect == "postgresql":
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        scans = []
+
+        def walk(node):
+            if node["Node Type"] == "Seq Scan":
+                scans.append((node["Relation Name"], f"Seq Scan on {node['Relation Name']} (est. {node['Plan Rows']} rows out)"))
+            for child in node.get("Plans", ()):
+                walk(child)
+
+        walk(plan[0]["Plan"])
+        return scans
+
+    cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+    scans = []
+    for row in cursor.fetchall():
+        detail = row[-1]
+        # "SCAN theaters" reads the whole table; "SEARCH ... USING INDEX" doesn't
+        match = re.match(r"SCAN (\w+)", detail)
+        if match:
+            # Aliased tables (screens_1 in a joinedload) are reported by alias
+            scans.append((re.sub(r"_\d+$", "", match.group(1)), detail))
+    return scans
+
+async def capture_statements(endpoints):
+    import main
+    from cache import catalog_cache
+
+    global _captured
+    captured = {}
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://explain") as client:
+            sample = await sample_catalog(client)
+            for i, (name, method, route, build) in enumerate(endpoints):
+                path, body = build(sample, random.Random(i))
+                # Cached responses would hide the route's queries
+                catalog_cache.clear()
+                _captured = []
+                try:
+                    response = await client.request(method, path, json=body)
+                finally:
+                    statements, _captured = _captured, None
+                captured[name] = (route, path, response.status_code, statements)
+    return captured
+
+def check(captured, sizes, max_scan_rows):
+    failures = []
+    report = []
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        dialect = engine.dialect.name
+        if dialect == "postgresql":
+            cursor.execute("ANALYZE")
+        for name, (route, path, status, statements) in captured.items():
+            entry = {"endpoint": name, "route": route, "path": path, "status": status, "statements": len(statements), "scans": []}
+            for statement, parameters in dict.fromkeys((s, _freeze(p)) for s, p in statements):
+                if not statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")):
+                    continue
+                for table, detail in full_scans(cursor, dialect, statement, _thaw(parameters)):
+                    rows = sizes.get(table, 0)
+                    expected = (name, table) in EXPECTED_SCANS
+                    scan = {"table": table, "rows": rows, "plan": detail, "expected": expected, "sql": " ".join(statement.split())[:300]}
+                    entry["scans"].append(scan)
+                    if rows > max_scan_rows and not expected:
+                        failures.append((name, scan))
+            report.append(entry)
+        raw.rollback()
+    finally:
+        raw.close()
+    return report, failures
+
+def _freeze(parameters):
+    if isinstance(parameters, dict):
+        return ("dict", tuple(sorted(parameters.items())))
+    return ("seq", tuple(parameters or ()))
+
+def _thaw(frozen):
+    kind, items = frozen
+    return dict(items) if kind == "dict" else items
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-scan-rows", type=int, default=10000, help="fail on full scans of tables larger than this")
+    parser.add_argument("--include-writes", action="store_true", help="also run the POST routes (writes to the database)")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    endpoints = [e for e in ENDPOINTS if args.include_writes or e[1] == "GET"]
+    captured = asyncio.run(capture_statements(endpoints))
+    sizes = table_sizes()
+    report, failures = check(captured, sizes, args.max_scan_rows)
+
+    if args.json:
+        print(json.dumps({"table_rows": sizes, "max_scan_rows": args.max_scan_rows, "endpoints": report}, indent=2))
+    else:
+        for entry in report:
+            print(f"{entry['endpoint']:>20}  {entry['status']}  {entry['statements']} statements  {len(entry['scans'])} full scans")
+            for scan in entry["scans"]:
+                marker = "ok  " if scan["expected"] or scan["rows"] <= args.max_scan_rows else "FAIL"
+                print(f"{'':>22}{marker} {scan['plan']} [{scan['rows']} rows]")
+    if failures:
+        print(f"\n{len(failures)} full scan(s) over {args.max_scan_rows} rows:", file=sys.stderr)
+        for name, scan in failures:
+            print(f"  {name}: {scan['plan']}\n    {scan['sql']}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Fill theaters, screens and best_seat_suggestions with a synthetic catalog
+of configurable size, then rebuild the vote tallies and computed seats so
+every route has realistic data behind it. Deterministic for a given --seed.
+
+    python -m benchmarks.generate_catalog --theaters 100000 --suggestions 10000000 --reset
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from database import SessionLocal
+from models import BestSeatSuggestion, Screen, SeatVote, Theater, normalize_city
+from consensus import rebuild_tallies
+from catalog import bump_catalog_version
+from score_seats import BATCH_SIZE as SCORE_BATCH_SIZE, score_batch
+
+# (city, state, lat, lon) centers that generated theaters are scattered around
+CITIES = [
+    ("New York", "NY", 40.71, -74.01), ("Los Angeles", "CA", 34.05, -118.24),
+    ("Chicago", "IL", 41.88, -87.63), ("Houston", "TX", 29.76, -95.37),
+    ("Phoenix", "AZ", 33.45, -112.07), ("Philadelphia", "PA", 39.95, -75.17),
+    ("San Antonio", "TX", 29.42, -98.49), ("San Diego", "CA", 32.72, -117.16),
+    ("Dallas", "TX", 32.78, -96.80), ("San Jose", "CA", 37.34, -121.89),
+    ("Austin", "TX", 30.27, -97.74), ("Seattle", "WA", 47.61, -122.33),
+    ("Denver", "CO", 39.74, -104.99), ("Boston", "MA", 42.36, -71.06),
+    ("Nashville", "TN", 36.16, -86.78), ("Portland", "OR", 45.52, -122.68),
+    ("Las Vegas", "NV", 36.17, -115.14), ("Atlanta", "GA", 33.75, -84.39),
+    ("Miami", "FL", 25.76, -80.19), ("Minneapolis", "MN", 44.98, -93.27),
+]
+BRANDS = ["AMC", "Regal", "Cinemark", "Alamo Drafthouse", "Marcus", "Harkins", None]
+NOTES = ["Great view", "Centered", "Perfect for IMAX", "Good legroom", "Away from the aisle"]
+
+def log(message, start):
+    print(f"[{time.perf_counter() - start:8.1f}s] {message}", flush=True)
+
+def reset_catalog(session):
+    # Only what a previous run generated (osm_id < 0); the OSM catalog and
+    # real suggestions are never touched
+    synthetic_screens = select(Screen.id).where(Screen.theater_id.in_(select(Theater.id).where(Theater.osm_id < 0)))
+    session.execute(delete(SeatVote).where(SeatVote.screen_id.in_(synthetic_screens)))
+    session.execute(delete(BestSeatSuggestion).where(BestSeatSuggestion.screen_id.in_(synthetic_screens)))
+    session.execute(delete(Screen).where(Screen.id.in_(synthetic_screens)))
+    deleted = session.execute(delete(Theater).where(Theater.osm_id < 0)).rowcount
+    session.commit()
+    return deleted
+
+def generate_layout(rng, is_imax):
+    # Wider and deeper rooms for IMAX; a center aisle in about half the rooms
+    rows = int(rng.integers(14, 23)) if is_imax else int(rng.integers(6, 19))
+    width = int(rng.integers(20, 33)) if is_imax else int(rng.integers(10, 27))
+    aisle = width // 2 if rng.random() < 0.5 else None
+    layout_rows = []
+    for r in range(rows):
+        seats = ["X" if rng.random() < 0.02 else "S" for _ in range(width)]
+        if aisle is not None:
+            seats.insert(aisle, "_")
+        layout_rows.append({"label": chr(ord("A") + r), "seats": "".join(seats)})
+    return {"rows": layout_rows}, rows, width
+
+def insert_theaters(session, rng, count, screens_min, screens_max, chunk_size, start):
+    for first in range(0, count, chunk_size):
+        rows = []
+        for i in range(first, min(first + chunk_size, count)):
+            city, state, lat, lon = CITIES[int(rng.integers(len(CITIES)))]
+            rows.append({
+                "osm_id": -(i + 1),  # negative so synthetic rows never collide with OSM ids
+                "name": f"Synthetic Cinema {i + 1}",
+                "brand": BRANDS[int(rng.integers(len(BRANDS)))],
+                "street": f"{int(rng.integers(1, 9999))} Main Street",
+                "city": city,
+                "city_normalized": normalize_city(city),
+                "state": state,
+                "postcode": f"{int(rng.integers(10000, 99999))}",
+                "country": "US",
+                "lat": lat + float(rng.normal(0, 0.2)),
+                "lon": lon + float(rng.normal(0, 0.2)),
+                "screens_count": int(rng.integers(screens_min, screens_max + 1)),
+                "screens_count_source": "synthetic",
+            })
+        session.execute(insert(Theater), rows)
+        session.commit()
+        log(f"theaters: {first + len(rows)}/{count}", start)
+
+def insert_screens(session, rng, chunk_size, start):
+    # Returns every screen id with its (rows, seats per row), used to aim
+    # the generated suggestions at seats that exist
+    theaters = session.execute(select(Theater.id, Theater.screens_count).where(Theater.osm_id < 0).order_by(Theater.id)).all()
+    dims = []
+    rows = []
+
+    def flush():
+        session.execute(insert(Screen), rows)
+        session.commit()
+        rows.clear()
+
+    for theater_id, count in theaters:
+        for number in range(1, count + 1):
+            is_imax = bool(rng.random() < 0.05)
+            layout, num_rows, width = generate_layout(rng, is_imax)
+            rows.append({
+                "theater_id": theater_id,
+                "screen_number": number,
+                "name": "IMAX" if is_imax else f"Screen {number}",
+                "is_imax": is_imax,
+                "layout_json": layout,
+            })
+            dims.append((num_rows, width))
+            if len(rows) >= chunk_size:
+                flush()
+                log(f"screens: {len(dims)}", start)
+    if rows:
+        flush()
+    log(f"screens: {len(dims)}", start)
+
+    screen_ids = session.scalars(
+        select(Screen.id).where(Screen.theater_id.in_(select(Theater.id).where(Theater.osm_id < 0))).order_by(Screen.id)
+    ).all()
+    return np.array(screen_ids), np.array(dims)
+
+def insert_suggestions(session, rng, screen_ids, dims, count, chunk_size, start):
+    now = datetime.utcnow()
+    for first in range(0, count, chunk_size):
+        n = min(chunk_size, count - first)
+        # Popularity is skewed: a minority of screens get most of the votes
+        picks = (rng.random(n) ** 3 * len(screen_ids)).astype(np.int64)
+        num_rows, widths = dims[picks, 0], dims[picks, 1]
+        # Voters favour the back two thirds and the middle of a row
+        row = np.clip(rng.normal(0.65, 0.2, n) * num_rows, 0, num_rows - 1).astype(np.int64)
+        seat = np.clip(rng.normal(0.5, 0.15, n) * widths, 1, widths).astype(np.int64)
+        age_seconds = rng.uniform(0, 365 * 86400, n)
+        has_note = rng.random(n) < 0.1
+        note_index = rng.integers(len(NOTES), size=n)
+        rows = [
+            {
+                "screen_id": int(screen_ids[picks[i]]),
+                "suggested_seat": f"{chr(ord('A') + int(row[i]))}{int(seat[i])}",
+                "user_notes": NOTES[note_index[i]] if has_note[i] else None,
+                "timestamp": now - timedelta(seconds=float(age_seconds[i])),
+            }
+            for i in range(n)
+        ]
+        session.execute(insert(BestSeatSuggestion), rows)
+        session.commit()
+        log(f"suggestions: {first + n}/{count}", start)
+
+def score_screens(session, start):
+    screens = session.execute(
+        select(Screen.id, Screen.layout_json, Screen.is_imax)
+        .where(Screen.layout_json.isnot(None))
+        .order_by(Screen.id)
+        .execution_options(yield_per=SCORE_BATCH_SIZE)
+    )
+    scored = 0
+    for batch in screens.partitions():
+        scored += score_batch(session, batch)[0]
+    log(f"computed best seats: {scored}", start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--theaters", type=int, default=1000)
+    parser.add_argument("--screens-min", type=int, default=1)
+    parser.add_argument("--screens-max", type=int, default=16)
+    parser.add_argument("--suggestions", type=int, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="delete the synthetic catalog from a previous run first")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rng = np.random.default_rng(args.seed)
+    session = SessionLocal()
+    try:
+        if args.reset:
+            log(f"deleted {reset_catalog(session)} synthetic theaters", start)
+        elif session.scalar(select(func.count()).select_from(Theater).where(Theater.osm_id < 0)):
+            raise SystemExit("Synthetic theaters already exist; pass --reset to regenerate.")
+
+        insert_theaters(session, rng, args.theaters, args.screens_min, args.screens_max, args.chunk_size, start)
+        screen_ids, dims = insert_screens(session, rng, args.chunk_size, start)
+        if args.suggestions and len(screen_ids):
+            insert_suggestions(session, rng, screen_ids, dims, args.suggestions, args.chunk_size, start)
+
+        # Derived state the read routes serve: vote tallies, consensus and computed seats
+        tallied = rebuild_tallies(session, args.chunk_size)
+        log(f"seat tallies: {tallied}", start)
+        score_screens(session, start)
+        bump_catalog_version(session)
+        session.commit()
+    finally:
+        session.close()
+    log("done", start)
+
+if __name__ == "__main__":
+    main()
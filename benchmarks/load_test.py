@@ -0,0 +1,176 @@
+"""Load driver: hits every route in main.py at a fixed concurrency and records
+p50/p95/p99 latency and throughput per endpoint as JSON, so runs can be
+compared between commits.
+
+Targets a running server, or the app in-process (no network, lifespan run
+here) with --in-process. Ids are sampled from the API itself.
+
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --requests 500 --concurrency 32 --output results.json
+    python -m benchmarks.load_test --in-process --skip-writes
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone
+import httpx
+from benchmarks.sync_vs_async import summarize
+
+SEATS = [f"{row}{number}" for row in "DEFGHJK" for number in range(5, 15)]
+
+# (name, method, route template, request builder). The builder gets the
+# sampled catalog and an rng and returns (path, json body or None).
+ENDPOINTS = [
+    ("root", "GET", "/", lambda s, r: ("/", None)),
+    ("healthz", "GET", "/healthz", lambda s, r: ("/healthz", None)),
+    ("metrics", "GET", "/metrics", lambda s, r: ("/metrics", None)),
+    ("theaters_page", "GET", "/theaters", lambda s, r: (f"/theaters?limit=100&after={r.choice(s['after'])}", None)),
+    ("theaters_nearby", "GET", "/theaters/nearby",
+        lambda s, r: ("/theaters/nearby?lat={:.4f}&lon={:.4f}&radius_km=25".format(*r.choice(s["points"])), None)),
+    ("theaters_batch", "GET", "/theaters/batch",
+        lambda s, r: ("/theaters/batch?ids=" + ",".join(map(str, r.sample(s["theater_ids"], min(20, len(s['theater_ids']))))), None)),
+    ("theater", "GET", "/theaters/{theater_id}", lambda s, r: (f"/theaters/{r.choice(s['theater_ids'])}", None)),
+    ("cities", "GET", "/cities", lambda s, r: ("/cities", None)),
+    ("cities_suggest", "GET", "/cities/suggest", lambda s, r: (f"/cities/suggest?prefix={r.choice(s['cities'])[:2]}", None)),
+    ("search", "GET", "/search", lambda s, r: (f"/search?q={r.choice(s['cities'])[:r.randint(2, 6)]}", None)),
+    ("theaters_by_city", "GET", "/theaters/by_city/{city}", lambda s, r: (f"/theaters/by_city/{r.choice(s['cities'])}?limit=100", None)),
+    ("screens_page", "GET", "/screens", lambda s, r: (f"/screens?limit=100&after={r.choice(s['after'])}", None)),
+    ("screen", "GET", "/screens/{screen_id}", lambda s, r: (f"/screens/{r.choice(s['screen_ids'])}", None)),
+    ("theater_screens", "GET", "/theaters/{theater_id}/screens", lambda s, r: (f"/theaters/{r.choice(s['theater_ids'])}/screens", None)),
+    ("best_block", "GET", "/screens/{screen_id}/best_block",
+        lambda s, r: (f"/screens/{r.choice(s['screen_ids'])}/best_block?size={r.randint(2, 6)}", None)),
+    ("heatmap", "GET", "/screens/{screen_id}/heatmap", lambda s, r: (f"/screens/{r.choice(s['screen_ids'])}/heatmap", None)),
+    ("best_seat", "GET", "/screens/{screen_id}/best_seat", lambda s, r: (f"/screens/{r.choice(s['screen_ids'])}/best_seat", None)),
+    ("export", "GET", "/export/{table}.{format}", lambda s, r: (f"/export/{r.choice(['theaters', 'screens'])}.parquet", None)),
+    ("suggest_best_seat", "POST", "/screens/{screen_id}/suggest_best_seat",
+        lambda s, r: (f"/screens/{r.choice(s['screen_ids'])}/suggest_best_seat", {"suggested_seat": r.choice(SEATS)})),
+    ("suggestions_batch", "POST", "/suggestions/batch",
+        lambda s, r: ("/suggestions/batch", {"suggestions": [
+            {"screen_id": r.choice(s["screen_ids"]), "suggested_seat": r.choice(SEATS)} for _ in range(10)
+        ]})),
+]
+
+async def sample_catalog(client):
+    theaters = (await client.get("/theaters", params={"fields": "id,city", "limit": 1000})).json()
+    screens = (await client.get("/screens", params={"fields": "id", "limit": 1000})).json()
+    if not theaters or not screens:
+        raise SystemExit("The catalog is empty; run benchmarks.generate_catalog first.")
+    theater_ids = [t["id"] for t in theaters]
+    details = (await client.get("/theaters/batch", params={"ids": ",".join(map(str, theater_ids[:100]))})).json()
+    return {
+        "theater_ids": theater_ids,
+        "screen_ids": [s["id"] for s in screens],
+        "cities": sorted({t["city"] for t in theaters if t["city"]}) or ["unknown"],
+        "points": [(t["lat"], t["lon"]) for t in details if t["lat"] is not None] or [(0.0, 0.0)],
+        # Keyset cursors spread over the first page of ids
+        "after": [0] + theater_ids[::100],
+    }
+
+async def run_endpoint(client, endpoint, sample, requests, concurrency, seed):
+    name, method, _, build = endpoint
+    rng = random.Random(seed)
+    calls = [build(sample, rng) for _ in range(requests)]
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = Counter()
+
+    async def call(path, body):
+        async with limit:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(path, body) for path, body in calls))
+    result = summarize(name, latencies, time.perf_counter() - start)
+    result["method"] = method
+    result["statuses"] = dict(statuses)
+    result["errors"] = sum(count for status, count in statuses.items() if status[0] not in "234")
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def uncovered_routes(app):
+    covered = {(method, route) for _, method, route, _ in ENDPOINTS}
+    return sorted(
+        f"{method} {route.path}"
+        for route in app.routes if hasattr(route, "methods") and route.path not in ("/openapi.json", "/docs", "/docs/oauth2-redirect", "/redoc")
+        for method in route.methods - {"HEAD"}
+        if (method, route.path) not in covered
+    )
+
+async def run(args):
+    endpoints = [e for e in ENDPOINTS if (not args.only or e[0] in args.only) and not (args.skip_writes and e[1] != "GET")]
+    meta = {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "target": "in-process" if args.in_process else args.base_url,
+        "requests_per_endpoint": args.requests,
+        "concurrency": args.concurrency,
+    }
+
+    if args.in_process:
+        import main
+        missing = uncovered_routes(main.app)
+        if missing:
+            meta["uncovered_routes"] = missing
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+                results = await drive(client, endpoints, args)
+    else:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+            results = await drive(client, endpoints, args)
+    return {"meta": meta, "results": results}
+
+async def drive(client, endpoints, args):
+    sample = await sample_catalog(client)
+    results = []
+    for i, endpoint in enumerate(endpoints):
+        # Warm caches and connections so the first endpoint isn't penalised
+        for _ in range(args.warmup):
+            path, body = endpoint[3](sample, random.Random(i))
+            await client.request(endpoint[1], path, json=body)
+        result = await run_endpoint(client, endpoint, sample, args.requests, args.concurrency, args.seed + i)
+        print(f"{result['path']:>20}  {result['throughput_rps']:>9} rps  p99 {result['p99_ms']:>9} ms  {result['statuses']}", flush=True)
+        results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--in-process", action="store_true", help="drive main.app directly instead of a server")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--only", nargs="+", help="endpoint names to run")
+    parser.add_argument("--skip-writes", action="store_true", help="leave out the POST routes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Read-your-writes check for the primary/replica split: posts one suggestion
+and shows that the write lands on the primary (DATABASE_URL), a plain GET is
+still served from the replica (DATABASE_READ_URL) without it, and a GET with
+the w2s_wrote cookie or the X-Read-Your-Writes header sees it. Exits 1 if any
+of those doesn't hold.
+
+The replica has to lag for the plain GET to be stale. With SQLite, a copy of
+the primary file is a replica that never catches up:
+
+    DATABASE_URL=sqlite:///w2s.db alembic upgrade head
+    DATABASE_URL=sqlite:///w2s.db python -m benchmarks.generate_catalog --theaters 1000 --suggestions 10000 --reset
+    cp w2s.db w2s_replica.db
+    DATABASE_URL=sqlite:///w2s.db DATABASE_READ_URL=sqlite:///w2s_replica.db python -m benchmarks.read_replica_check
+
+Against Postgres, pause replay on the replica first (SELECT pg_wal_replay_pause())
+and resume it afterwards. Run without SUGGESTION_WRITE_BEHIND, which defers
+the write past the response.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import httpx
+from sqlalchemy import select
+from database import READ_YOUR_WRITES_COOKIE, engine, read_engine
+from models import Screen, SeatVote
+from suggestion_buffer import WRITE_BEHIND_ENABLED
+
+def tally(bind, screen_id, seat):
+    with bind.connect() as conn:
+        votes = conn.scalar(select(SeatVote.votes).where(SeatVote.screen_id == screen_id, SeatVote.seat == seat))
+    return votes or 0
+
+def pick_screen(screen_id=None):
+    # A screen with a seat to vote for that the replica already has
+    query = select(Screen.id, Screen.best_seat, Screen.computed_best_seat)\
+        .where((Screen.best_seat.isnot(None)) | (Screen.computed_best_seat.isnot(None)))
+    if screen_id is not None:
+        query = query.where(Screen.id == screen_id)
+    with read_engine.connect() as conn:
+        row = conn.execute(query.order_by(Screen.id).limit(1)).first()
+    if row is None:
+        sys.exit("No screen with a best or computed seat on the replica; seed the catalog first")
+    return row.id, row.best_seat or row.computed_best_seat
+
+async def run(screen_id, seat):
+    import main
+
+    steps = []
+    path = f"/screens/{screen_id}/best_seat"
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replica-check") as client:
+            before = (await client.get(path)).json()
+            primary_before = tally(engine, screen_id, seat)
+            replica_before = tally(read_engine, screen_id, seat)
+
+            response = await client.post(f"/screens/{screen_id}/suggest_best_seat", json={"suggested_seat": seat})
+            steps.append(("POST suggest_best_seat", response.status_code == 200, f"{response.status_code}"))
+            steps.append(("sets the read-your-writes cookie", READ_YOUR_WRITES_COOKIE in response.cookies, response.headers.get("set-cookie")))
+            primary_after = tally(engine, screen_id, seat)
+            replica_after = tally(read_engine, screen_id, seat)
+            steps.append(("write lands on the primary", primary_after == primary_before + 1, f"{seat} votes {primary_before} -> {primary_after}"))
+            steps.append(("replica hasn't seen it", replica_after == replica_before, f"{seat} votes {replica_before} -> {replica_after}"))
+
+            # The client kept the cookie from the POST
+            with_cookie = (await client.get(path)).json()
+            client.cookies.clear()
+            plain = (await client.get(path)).json()
+            with_header = (await client.get(path, headers={"X-Read-Your-Writes": "1"})).json()
+
+    expected = {"suggested_seat": seat, "votes": primary_after}
+    seen = lambda body: {key: body.get(key) for key in expected}
+    steps.append(("plain GET reads the replica", plain == before, json.dumps(seen(plain))))
+    steps.append(("GET with cookie sees the write", seen(with_cookie) == expected, json.dumps(seen(with_cookie))))
+    steps.append(("GET with header sees the write", seen(with_header) == expected, json.dumps(seen(with_header))))
+    return steps
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--screen", type=int, help="screen to vote on (default: the first with a seat)")
+    args = parser.parse_args()
+
+    if read_engine is engine:
+        sys.exit("DATABASE_READ_URL is not set (or equals DATABASE_URL); there is no replica to check")
+    if WRITE_BEHIND_ENABLED:
+        sys.exit("Unset SUGGESTION_WRITE_BEHIND: buffered writes reach the primary after the response")
+
+    screen_id, seat = pick_screen(args.screen)
+    print(f"primary {engine.url.render_as_string(hide_password=True)}")
+    print(f"replica {read_engine.url.render_as_string(hide_password=True)}")
+    print(f"voting for {seat} on screen {screen_id}")
+    steps = asyncio.run(run(screen_id, seat))
+    for name, ok, detail in steps:
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<34} {detail}")
+    if not all(ok for _, ok, _ in steps):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
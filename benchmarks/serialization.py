@@ -0,0 +1,114 @@
+"""Serialization cost of a catalog-sized /theaters response: the old path
+(dicts through FastAPI's jsonable_encoder and stdlib json) against the typed
+structs encoded by StructResponse.
+
+Rows are synthetic and no database is touched, so the numbers isolate
+serialization. This is the per-request work once a page is in the catalog cache.
+
+    python -m benchmarks.serialization --rows 5000 --requests 300
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from types import SimpleNamespace
+import httpx
+import msgspec
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from benchmarks.sync_vs_async import summarize
+from projections import THEATER_SUMMARY, StructResponse
+
+def synthetic_rows(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            id=i,
+            name=f"Cinema {i}",
+            brand=rng.choice(["AMC", "Regal", "Cinemark", None]),
+            city=f"City {i % 400}",
+            state=rng.choice(["CA", "NY", "TX", "MA", "PA"]),
+            country="US",
+            street=f"{rng.randint(1, 9999)} Main Street",
+            postcode=f"{rng.randint(10000, 99999)}",
+            screens_count=rng.randint(1, 24),
+        )
+        for i in range(1, count + 1)
+    ]
+
+def build_app(structs, dicts):
+    app = FastAPI()
+
+    @app.get("/dicts")
+    def dict_path():
+        return dicts
+
+    @app.get("/structs")
+    def struct_path():
+        return StructResponse(structs)
+
+    return app
+
+def measure_encode(name, encode, repeat):
+    size = len(encode())
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        t = time.perf_counter()
+        encode()
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    result = summarize(name, latencies, elapsed)
+    result["mb_per_sec"] = round(size * repeat / elapsed / 1e6, 1)
+    return result
+
+async def measure_http(app, path, requests):
+    latencies = []
+    total_bytes = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)
+        start = time.perf_counter()
+        for _ in range(requests):
+            t = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - t)
+            total_bytes += len(response.content)
+        elapsed = time.perf_counter() - start
+    result = summarize(path.strip("/"), latencies, elapsed)
+    result["mb_per_sec"] = round(total_bytes / elapsed / 1e6, 1)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    structs = [THEATER_SUMMARY.serialize(row) for row in synthetic_rows(args.rows)]
+    dicts = msgspec.to_builtins(structs)
+
+    def stdlib():
+        # What JSONResponse does with a route's return value
+        return json.dumps(jsonable_encoder(dicts), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    def fast():
+        return StructResponse(structs).body
+
+    app = build_app(structs, dicts)
+    results = {
+        "rows": args.rows,
+        "encode": [
+            measure_encode("jsonable_encoder+json", stdlib, args.requests),
+            measure_encode("struct", fast, args.requests),
+        ],
+        "http": [
+            asyncio.run(measure_http(app, "/dicts", args.requests)),
+            asyncio.run(measure_http(app, "/structs", args.requests)),
+        ],
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Side-by-side latency/throughput of the sync (threadpool) and async (asyncpg)
+database paths for the theater-detail read.
+
+    python -m benchmarks.sync_vs_async --requests 2000 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select
+from database import POOL_SETTINGS, SessionLocal, get_async_engine, get_async_sessionmaker
+from models import Theater, Screen
+
+# FastAPI runs sync routes on anyio's default threadpool of 40 threads
+THREADPOOL_SIZE = 40
+
+def summarize(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "path": name,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p95_ms": round(quantiles[94] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2),
+    }
+
+def sync_read(theater_id):
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        db.get(Theater, theater_id)
+        db.execute(select(Screen).where(Screen.theater_id == theater_id)).all()
+    finally:
+        db.close()
+    return time.perf_counter() - start
+
+def run_sync(ids):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADPOOL_SIZE) as pool:
+        latencies = list(pool.map(sync_read, ids))
+    return summarize("sync", latencies, time.perf_counter() - start)
+
+async def run_async(ids, concurrency):
+    sessionmaker = get_async_sessionmaker()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def async_read(theater_id):
+        async with limit:
+            start = time.perf_counter()
+            async with sessionmaker() as db:
+                await db.get(Theater, theater_id)
+                (await db.execute(select(Screen).where(Screen.theater_id == theater_id))).all()
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(async_read(i) for i in ids))
+    elapsed = time.perf_counter() - start
+    await get_async_engine().dispose()
+    return summarize("async", latencies, elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    theater_ids = [row.id for row in db.query(Theater.id)]
+    db.close()
+    if not theater_ids:
+        raise SystemExit("No theaters in the database; load or generate a catalog first.")
+    rng = random.Random(args.seed)
+    ids = [rng.choice(theater_ids) for _ in range(args.requests)]
+
+    results = {
+        "pool": POOL_SETTINGS,
+        "concurrency": args.concurrency,
+        "results": [run_sync(ids), asyncio.run(run_async(ids, args.concurrency))],
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from starlette.concurrency import run_in_threadpool
+from catalog import cached_catalog_versions, current_catalog_versions
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+
+# Key kinds (a key's first element) whose values include vote-derived fields
+# (Screen.best_seat, seat tallies); only these are dropped by a suggestion write
+VOTE_DEPENDENT_KINDS = frozenset({"theater", "theater_screens", "heatmap", "screens"})
+
+class _Flight:
+    # One in-progress load that concurrent misses for the same key wait on
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class CatalogCache:
+    """Bounded LRU + TTL cache for catalog responses.
+
+    Entries are dropped wholesale whenever the catalog version moves (a
+    loader ran), and the VOTE_DEPENDENT_KINDS ones whenever the votes version
+    does (a suggestion was stored).
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS,
+                 version_source=current_catalog_versions, cached_version_source=cached_catalog_versions):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_source = version_source
+        # The versions without a query, or None when version_source would run one
+        self.cached_version_source = cached_version_source
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._versions = None
+        self._generation = 0
+        self._vote_generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            # Loads already running must not repopulate the cache with old data
+            self._generation += 1
+
+    def clear_votes(self):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in VOTE_DEPENDENT_KINDS]:
+                del self._entries[key]
+            self._vote_generation += 1
+
+    def _check_version(self, versions=None):
+        if versions is None:
+            versions = self.version_source()
+        if versions != self._versions:
+            if self._versions is None or versions[0] != self._versions[0]:
+                self.clear()
+            else:
+                self.clear_votes()
+            self._versions = versions
+
+    def _lookup(self, key):
+        # Caller holds self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _current_generation(self):
+        # Caller holds self._lock
+        return self._generation, self._vote_generation
+
+    def _store(self, key, value, generation):
+        # Caller holds self._lock
+        if generation[0] != self._generation:
+            return
+        if key[0] in VOTE_DEPENDENT_KINDS and generation[1] != self._vote_generation:
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        self._check_version()
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                generation = self._current_generation()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        else:
+            with self._lock:
+                self._store(key, flight.value, generation)
+            return flight.value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    async def get_or_load_async(self, key, loader):
+        """get_or_load for the async routes, awaiting the coroutine function
+        loader. The version check only leaves the event loop (for the
+        threadpool) when it needs the database; misses aren't coalesced."""
+        versions = self.cached_version_source()
+        if versions is None:
+            await run_in_threadpool(self._check_version)
+        else:
+            self._check_version(versions)
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            # As in get_or_load: a bump during the load keeps its result out
+            generation = self._current_generation()
+            self.misses += 1
+
+        value = await loader()
+        with self._lock:
+            self._store(key, value, generation)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
+
+catalog_cache = CatalogCache()
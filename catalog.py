@@ -0,0 +1,69 @@
+import os
+import threading
+import time
+from sqlalchemy import update
+from database import ReadSessionLocal
+from models import CatalogVersion
+
+# How stale an API process may be about loader runs in other processes
+VERSION_CHECK_SECONDS = float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", "30"))
+
+_lock = threading.Lock()
+_versions = None
+_checked_at = 0.0
+
+def bump_catalog_version(session):
+    # Loaders: theaters or screens changed. Runs inside the caller's
+    # transaction, so the bump commits with the data
+    result = session.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.id == 1)
+        .values(version=CatalogVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        session.add(CatalogVersion(id=1, version=1, votes_version=0))
+
+def bump_votes_version(session):
+    # Suggestion writes: only tallies and Screen.best_seat moved, so the
+    # theater-only views (nearby, cities, search, /theaters) stay valid
+    result = session.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.id == 1)
+        .values(votes_version=CatalogVersion.votes_version + 1)
+    )
+    if result.rowcount == 0:
+        session.add(CatalogVersion(id=1, version=0, votes_version=1))
+
+def read_catalog_versions(session):
+    row = session.query(CatalogVersion.version, CatalogVersion.votes_version).filter(CatalogVersion.id == 1).first()
+    return (row.version, row.votes_version) if row else (0, 0)
+
+def cached_catalog_versions():
+    # What current_catalog_versions() would return without a query, or None
+    # once it is due for a re-check
+    if _versions is not None and time.monotonic() - _checked_at < VERSION_CHECK_SECONDS:
+        return _versions
+    return None
+
+def current_catalog_versions(force=False):
+    # (catalog version, votes version), read from the version row at most
+    # once every VERSION_CHECK_SECONDS unless force=True (e.g. right after a
+    # local write). Read from the replica, like the responses they version:
+    # a bump replicates in the same transaction as the data it covers.
+    global _versions, _checked_at
+    if not force and _versions is not None and time.monotonic() - _checked_at < VERSION_CHECK_SECONDS:
+        return _versions
+    with _lock:
+        if not force and _versions is not None and time.monotonic() - _checked_at < VERSION_CHECK_SECONDS:
+            return _versions
+        db = ReadSessionLocal()
+        try:
+            _versions = read_catalog_versions(db)
+        finally:
+            db.close()
+        _checked_at = time.monotonic()
+        return _versions
+
+def current_catalog_version(force=False):
+    # The loader-driven part, which the in-memory indexes rebuild on
+    return current_catalog_versions(force)[0]
@@ -0,0 +1,52 @@
+import threading
+from bisect import bisect_left
+from sqlalchemy import func
+from catalog import current_catalog_version
+from database import ReadSessionLocal
+from models import Theater
+
+class CityIndex:
+    """Sorted normalized city names for prefix lookups by binary search."""
+
+    def __init__(self, rows, version):
+        # rows: (city_normalized, display name) pairs
+        rows = sorted(rows)
+        self.keys = [key for key, _ in rows]
+        self.names = [name for _, name in rows]
+        self.version = version
+
+    def suggest(self, prefix, limit):
+        prefix = prefix.strip().lower()
+        start = bisect_left(self.keys, prefix)
+        matches = []
+        for i in range(start, min(start + limit, len(self.keys))):
+            if not self.keys[i].startswith(prefix):
+                break
+            matches.append(self.names[i])
+        return matches
+
+def build_city_index(db, version):
+    rows = db.query(Theater.city_normalized, func.min(Theater.city))\
+        .filter(Theater.city_normalized.isnot(None), Theater.missing_since.is_(None))\
+        .group_by(Theater.city_normalized)\
+        .all()
+    return CityIndex([(key, name) for key, name in rows], version)
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_city_index():
+    # Rebuilt when the catalog version moves, like the nearby index
+    global _index
+    version = current_catalog_version()
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                db = ReadSessionLocal()
+                try:
+                    _index = build_city_index(db, version)
+                finally:
+                    db.close()
+            index = _index
+    return index
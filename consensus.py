@@ -0,0 +1,143 @@
+import math
+import os
+from datetime import datetime, timezone
+from sqlalchemy import case, delete, func, insert, select, update
+from database import insert_on_conflict
+from models import BestSeatSuggestion, Screen, SeatVote
+from catalog import bump_votes_version
+
+# Optional exponential decay of old votes. Each vote is weighted
+# 2^((t - EPOCH) / half_life), which ranks seats exactly like decaying every
+# existing vote over time but never requires rewriting old rows. Those
+# weights overflow a float after ~1000 half-lives, so SeatVote.score holds
+# the natural log of a seat's summed weights (ln(votes) without decay).
+# Changing the half-life means re-running backfill_best_seats.py.
+HALF_LIFE_DAYS = float(os.getenv("BEST_SEAT_HALF_LIFE_DAYS", "0"))
+DECAY_EPOCH = datetime(2025, 1, 1)
+
+def vote_log_weight(timestamp):
+    if HALF_LIFE_DAYS <= 0 or timestamp is None:
+        return 0.0
+    age_days = (timestamp - DECAY_EPOCH).total_seconds() / 86400
+    return age_days / HALF_LIFE_DAYS * math.log(2)
+
+def log_add(a, b):
+    # ln(e^a + e^b) without leaving log space; a may be None (no votes yet)
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+# Past this gap the smaller term can't change the sum (e^-700 is far below
+# a double's precision), and Postgres' exp() raises on underflow near -745
+LOG_ADD_MAX_GAP = 700.0
+
+def log_add_sql(a, b):
+    # log_add for the upsert; exp() only ever sees an argument in [-700, 0]
+    return case(
+        (a - b >= LOG_ADD_MAX_GAP, a),
+        (b - a >= LOG_ADD_MAX_GAP, b),
+        (a >= b, a + func.ln(1 + func.exp(b - a))),
+        else_=b + func.ln(1 + func.exp(a - b)),
+    )
+
+def best_seat_subquery():
+    return (
+        select(SeatVote.seat)
+        .where(SeatVote.screen_id == Screen.id)
+        .order_by(SeatVote.score.desc(), SeatVote.last_voted_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+def record_votes(session, votes):
+    # votes: dicts with screen_id, seat and optional notes/timestamp. Call inside
+    # the transaction that stores the suggestions themselves.
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    tallies = {}
+    for vote in votes:
+        timestamp = vote.get("timestamp") or now
+        tally = tallies.setdefault((vote["screen_id"], vote["seat"]), {
+            "screen_id": vote["screen_id"],
+            "seat": vote["seat"],
+            "votes": 0,
+            "score": None,
+            "last_notes": None,
+            "last_voted_at": timestamp,
+        })
+        tally["votes"] += 1
+        tally["score"] = log_add(tally["score"], vote_log_weight(timestamp))
+        if timestamp >= tally["last_voted_at"]:
+            tally["last_notes"] = vote.get("notes")
+            tally["last_voted_at"] = timestamp
+    if not tallies:
+        return
+
+    # One multi-row upsert; rows are pre-aggregated because ON CONFLICT cannot
+    # touch the same row twice in a single statement
+    insert_stmt = insert_on_conflict(session, SeatVote).values(list(tallies.values()))
+    session.execute(insert_stmt.on_conflict_do_update(
+        index_elements=["screen_id", "seat"],
+        set_={
+            "votes": SeatVote.votes + insert_stmt.excluded.votes,
+            "score": log_add_sql(SeatVote.score, insert_stmt.excluded.score),
+            "last_notes": insert_stmt.excluded.last_notes,
+            "last_voted_at": insert_stmt.excluded.last_voted_at,
+        }
+    ))
+    screen_ids = {screen_id for screen_id, _ in tallies}
+    session.execute(
+        update(Screen)
+        .where(Screen.id.in_(screen_ids))
+        .values(best_seat=best_seat_subquery())
+    )
+
+def store_suggestions(session, suggestions):
+    # Multi-row INSERT of suggestion dicts (screen_id, suggested_seat,
+    # user_notes) plus the matching tally update; returns ids in input order
+    if not suggestions:
+        return []
+    ids = session.scalars(
+        insert(BestSeatSuggestion).returning(BestSeatSuggestion.id, sort_by_parameter_order=True),
+        suggestions,
+    ).all()
+    record_votes(session, [
+        {"screen_id": s["screen_id"], "seat": s["suggested_seat"], "notes": s.get("user_notes")}
+        for s in suggestions
+    ])
+    # Screen.best_seat may have moved: the vote-dependent cached responses are stale
+    bump_votes_version(session)
+    return ids
+
+def rebuild_tallies(session, chunk_size=10000):
+    # Recomputes every tally from the suggestion history, streaming the
+    # suggestions so memory is bounded by the number of distinct seats
+    tallies = {}
+    suggestions = session.query(
+        BestSeatSuggestion.screen_id,
+        BestSeatSuggestion.suggested_seat,
+        BestSeatSuggestion.user_notes,
+        BestSeatSuggestion.timestamp,
+    ).order_by(BestSeatSuggestion.id).yield_per(chunk_size)
+
+    for screen_id, seat, notes, timestamp in suggestions:
+        tally = tallies.setdefault((screen_id, seat), {
+            "screen_id": screen_id,
+            "seat": seat,
+            "votes": 0,
+            "score": None,
+            "last_notes": None,
+            "last_voted_at": None,
+        })
+        tally["votes"] += 1
+        tally["score"] = log_add(tally["score"], vote_log_weight(timestamp))
+        if tally["last_voted_at"] is None or (timestamp and timestamp >= tally["last_voted_at"]):
+            tally["last_notes"] = notes
+            tally["last_voted_at"] = timestamp
+
+    session.execute(delete(SeatVote))
+    rows = list(tallies.values())
+    for start in range(0, len(rows), chunk_size):
+        session.execute(insert(SeatVote), rows[start:start + chunk_size])
+    session.execute(update(Screen).values(best_seat=best_seat_subquery()))
+    return len(rows)
@@ -1,16 +1,172 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from metrics import TimedAsyncQueuePool, TimedAsyncReadQueuePool, TimedQueuePool, TimedReadQueuePool
 
 load_dotenv()
-print("DATABASE_URL:", os.getenv("DATABASE_URL"))
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL environment variable not set. Please check your .env file.")
 
-engine = create_engine(DATABASE_URL)
+# Optional read replica for the GET routes; without one every read goes to
+# the primary (DATABASE_URL) as before
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+
+def env_flag(name, default=False):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+# Pool sizing is shared by the sync and async engines (and the replica's). The sync routes run on
+# FastAPI's threadpool (40 threads), so pool_size + max_overflow caps how many
+# of them can be talking to Postgres at once.
+POOL_SETTINGS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": env_flag("DB_POOL_PRE_PING", True),
+}
+
+# Connections opened at startup so the first requests don't pay for TCP, TLS
+# and auth; capped at pool_size
+POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", "2"))
+
+# Embedded mode (DATABASE_URL=sqlite:///...): WAL lets the API read while a
+# loader writes, and NORMAL only syncs at checkpoints, which WAL makes safe
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "busy_timeout=5000",
+    "foreign_keys=ON",
+    "temp_store=MEMORY",
+    # Per connection, so kept small; the mmap is shared through the page cache
+    "cache_size=-16000",
+    "mmap_size=268435456",
+)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+def create_db_engine(url, **kwargs):
+    # create_engine, plus the pragmas when the URL is a SQLite file
+    db_engine = create_engine(url, **kwargs)
+    if db_engine.dialect.name == "sqlite":
+        event.listen(db_engine, "connect", _set_sqlite_pragmas)
+    return db_engine
+
+engine = create_db_engine(DATABASE_URL, poolclass=TimedQueuePool, **POOL_SETTINGS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+if DATABASE_READ_URL:
+    read_engine = create_db_engine(DATABASE_READ_URL, poolclass=TimedReadQueuePool, **POOL_SETTINGS)
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# A client that just wrote reads from the primary for this long, so it sees
+# its own suggestion while the replica catches up. Browsers get the cookie;
+# cross-site callers that can't keep it send the header on the follow-up read.
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+READ_YOUR_WRITES_COOKIE = "w2s_wrote"
+READ_YOUR_WRITES_HEADER = "x-read-your-writes"
+
+def reads_from_primary(request):
+    # Only meaningful with a replica; otherwise every read is on the primary anyway
+    return read_engine is not engine and (
+        READ_YOUR_WRITES_COOKIE in request.cookies or request.headers.get(READ_YOUR_WRITES_HEADER) == "1"
+    )
+
+def prewarm_pool(count=POOL_PREWARM):
+    # Opens the connections concurrently (on the replica too, if there is
+    # one), then returns them all to their pools
+    count = min(count, POOL_SETTINGS["pool_size"])
+    if count <= 0:
+        return 0
+    engines = list(dict.fromkeys((engine, read_engine))) * count
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=len(engines)) as pool:
+        connections = list(pool.map(lambda target: target.connect(), engines))
+    for connection in connections:
+        connection.close()
+    return count
+
+Base = declarative_base()
+
+def insert_on_conflict(session, table):
+    # INSERT ... ON CONFLICT DO UPDATE is spelled the same way on Postgres
+    # and SQLite (.on_conflict_do_update, .excluded), but each dialect has
+    # its own insert()
+    if session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
+
+def to_async_url(url):
+    # postgresql://... (or postgresql+psycopg2://...) -> postgresql+asyncpg://...
+    # and sqlite:///... -> sqlite+aiosqlite:///...
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if url.get_backend_name() == "postgresql":
+        query = dict(url.query)
+        # asyncpg spells libpq's sslmode as ssl
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return url.set(drivername="postgresql+asyncpg", query=query)
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+ASYNC_DATABASE_READ_URL = os.getenv("ASYNC_DATABASE_READ_URL") or (
+    to_async_url(DATABASE_READ_URL) if DATABASE_READ_URL else None
+)
+
+_async_engines = {}
+_async_sessionmakers = {}
+
+def get_async_engine(read=False):
+    # Created on first use so the sync-only scripts never import asyncpg
+    role = "read" if read and ASYNC_DATABASE_READ_URL else "primary"
+    if role not in _async_engines:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        connect_args = {}
+        if env_flag("DB_PGBOUNCER"):
+            # pgbouncer in transaction mode (e.g. the Supabase pooler on 6543)
+            # cannot keep asyncpg's prepared statements across transactions
+            connect_args["statement_cache_size"] = 0
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_READ_URL if role == "read" else ASYNC_DATABASE_URL,
+            connect_args=connect_args,
+            poolclass=TimedAsyncReadQueuePool if role == "read" else TimedAsyncQueuePool,
+            **POOL_SETTINGS,
+        )
+        if async_engine.dialect.name == "sqlite":
+            event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+        _async_engines[role] = async_engine
+    return _async_engines[role]
+
+async def prewarm_async_pool(count=POOL_PREWARM):
+    import asyncio
+    count = min(count, POOL_SETTINGS["pool_size"])
+    if count <= 0:
+        return 0
+    engines = dict.fromkeys((get_async_engine(), get_async_engine(read=True)))
+    connections = await asyncio.gather(*(target.connect() for target in engines for _ in range(count)))
+    for connection in connections:
+        await connection.close()
+    return count
+
+def get_async_sessionmaker(read=False):
+    async_engine = get_async_engine(read)
+    if async_engine not in _async_sessionmakers:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _async_sessionmakers[async_engine] = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessionmakers[async_engine]
@@ -0,0 +1,133 @@
+"""Bulk export of the theaters, screens and suggestions tables as Parquet,
+Arrow IPC stream or NDJSON, for analytics consumers.
+
+Rows are read in EXPORT_CHUNK_SIZE partitions from a server-side cursor and
+converted column-wise into record batches, so memory is bounded by one chunk
+whatever the table size. main.py serves the same stream on /export/{table}.{format}.
+
+    python export.py suggestions --format parquet --output suggestions.parquet
+"""
+import argparse
+import os
+import sys
+import msgspec
+from sqlalchemy import JSON, BigInteger, Boolean, DateTime, Float, Integer, String, select
+from database import read_engine
+from models import BestSeatSuggestion, Screen, Theater
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "10000"))
+
+TABLES = {
+    "theaters": Theater.__table__,
+    "screens": Screen.__table__,
+    "suggestions": BestSeatSuggestion.__table__,
+}
+
+MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "ndjson": "application/x-ndjson",
+}
+
+_encoder = msgspec.json.Encoder()
+
+def arrow_schema(table):
+    import pyarrow as pa
+
+    def arrow_type(column_type):
+        # Checked most specific first: BigInteger is an Integer
+        for sql_type, arrow in (
+            (BigInteger, pa.int64()), (Integer, pa.int64()), (Float, pa.float64()),
+            (Boolean, pa.bool_()), (DateTime, pa.timestamp("us")), (String, pa.string()),
+            (JSON, pa.string()),  # JSON documents are exported as their encoded text
+        ):
+            if isinstance(column_type, sql_type):
+                return arrow
+        raise TypeError(f"No Arrow type for {column_type!r}")
+
+    return pa.schema([pa.field(c.name, arrow_type(c.type), nullable=c.nullable) for c in table.columns])
+
+def read_chunks(table, chunk_size=EXPORT_CHUNK_SIZE):
+    # stream_results gives a named (server-side) cursor on psycopg2
+    with read_engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(
+            select(table).order_by(*table.primary_key.columns)
+        )
+        yield from result.partitions()
+
+def _record_batch(schema, json_columns, rows):
+    import pyarrow as pa
+
+    columns = list(zip(*rows))
+    for i in json_columns:
+        columns[i] = [None if v is None else _encoder.encode(v).decode() for v in columns[i]]
+    return pa.record_batch(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+    )
+
+class _ChunkSink:
+    # File-like target for the pyarrow writers that hands back whatever was
+    # written since the last drain(), so it can be streamed as it's produced
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+def export_stream(name, format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields the encoded export of table `name` piece by piece."""
+    table = TABLES[name]
+    if format == "ndjson":
+        # Positional structs straight from the row tuples; no per-row dicts
+        row_type = msgspec.defstruct(f"{name}_row", [c.name for c in table.columns])
+        for rows in read_chunks(table, chunk_size):
+            yield _encoder.encode_lines([row_type(*row) for row in rows])
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(table)
+    json_columns = [i for i, c in enumerate(table.columns) if isinstance(c.type, JSON)]
+    sink = _ChunkSink()
+    stream = pa.PythonFile(sink, mode="w")
+    # One Parquet row group / IPC record batch per chunk
+    writer = pq.ParquetWriter(stream, schema) if format == "parquet" else pa.ipc.new_stream(stream, schema)
+    for rows in read_chunks(table, chunk_size):
+        writer.write_batch(_record_batch(schema, json_columns, rows))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("table", choices=TABLES)
+    parser.add_argument("--format", choices=MEDIA_TYPES, default="parquet")
+    parser.add_argument("--output", help="file to write (default: stdout)")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        written = 0
+        for data in export_stream(args.table, args.format, args.chunk_size):
+            out.write(data)
+            written += len(data)
+    finally:
+        if args.output:
+            out.close()
+    print(f"Exported {args.table} as {args.format}: {written} bytes", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
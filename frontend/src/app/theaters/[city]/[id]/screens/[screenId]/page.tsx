@@ -193,7 +193,10 @@ export default function ScreenDetails({ params }: { params: { city: string; id:
       setSeatError(null);
       setNotesError(null);
       // After successful submission, re-fetch screen data to update displayed best seat
-      const updatedRes = await fetch(`https://bestseat.fly.dev/theaters/${params.id}`);
+      // (from the primary database, which already has the suggestion)
+      const updatedRes = await fetch(`https://bestseat.fly.dev/theaters/${params.id}`, {
+        headers: { "X-Read-Your-Writes": "1" },
+      });
       if (updatedRes.ok) {
         const updatedData = await updatedRes.json();
         const updatedScreen = updatedData.screens?.find((s: Screen) => s.id.toString() === params.screenId);
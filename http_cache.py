@@ -0,0 +1,137 @@
+"""Conditional GETs and compression for the catalog routes.
+
+Catalog responses are a function of the catalog version (bumped by the
+loaders) and, for the ones carrying best_seat or tallies, the votes version
+(bumped by suggestion writes), so those are the ETag. A revalidation whose
+tag is still current is answered by CatalogRoute once FastAPI has matched and
+validated the request, before the endpoint runs, so it costs no query and a
+malformed request still gets its 422. Streamed NDJSON is never tagged."""
+import asyncio
+import os
+import zlib
+from contextvars import ContextVar
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from catalog import cached_catalog_versions, current_catalog_versions
+from database import reads_from_primary
+
+# Route paths (as declared, so async_reads' ":int" forms too) whose
+# responses only change when a loader runs
+CATALOG_ROUTES = frozenset({
+    "/theaters", "/theaters/nearby", "/theaters/by_city/{city}", "/cities", "/cities/suggest", "/search",
+    "/screens/{screen_id}/best_block",
+})
+# ...and the ones that also change with every suggestion
+VOTE_DEPENDENT_ROUTES = frozenset({
+    "/theaters/batch", "/theaters/{theater_id}", "/theaters/{theater_id:int}", "/theaters/{theater_id}/screens",
+    "/screens", "/screens/{screen_id}", "/screens/{screen_id:int}", "/screens/{screen_id}/heatmap",
+    "/screens/{screen_id}/best_seat", "/screens/{screen_id:int}/best_seat",
+})
+VERSIONED_ROUTES = CATALOG_ROUTES | VOTE_DEPENDENT_ROUTES
+# A deploy can change the shape of a response without a catalog change
+RELEASE = format(zlib.crc32(os.getenv("FLY_IMAGE_REF", "dev").encode()), "08x")
+
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+# 9 costs far more CPU than 6 for a few percent on JSON
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# Parquet is compressed already, and the exports are too big to gzip on the event loop
+UNCOMPRESSED_PREFIXES = ("/export/", "/metrics")
+# A revalidation must never cost draining a cursor
+STREAMED_MEDIA_TYPE = "application/x-ndjson"
+
+# (versions, If-None-Match) for the request in flight, set by CatalogETagMiddleware
+_conditional = ContextVar("conditional", default=None)
+
+def _etag_matches(if_none_match, tags):
+    # "*" is deliberately not a match: it would 304 without knowing the
+    # resource exists
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate in tags:
+            return candidate
+    return None
+
+def _etags(path, versions):
+    version = f"{versions[0]}.{versions[1]}" if path in VOTE_DEPENDENT_ROUTES else str(versions[0])
+    # The gzipped body is a different representation, so it gets its own tag
+    return f'"{RELEASE}-{version}"', f'"{RELEASE}-{version}-gzip"'
+
+def _not_modified(path, values):
+    conditional = _conditional.get()
+    if conditional is None or values.get("format") == "ndjson":
+        return None
+    versions, if_none_match = conditional
+    matched = _etag_matches(if_none_match, _etags(path, versions))
+    if not matched:
+        return None
+    return Response(status_code=304, headers={"ETag": matched, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"})
+
+class CatalogRoute(APIRoute):
+    """APIRoute that answers a current conditional GET on a versioned route
+    with a 304 in place of the endpoint. The parameters have been validated
+    by then, and a tag only matches if this URL returned 200 at the same
+    versions, so the 304 stands in for exactly that 200."""
+
+    def get_route_handler(self):
+        call, path = self.dependant.call, self.path
+        if path in VERSIONED_ROUTES:
+            if asyncio.iscoroutinefunction(call):
+                async def endpoint(**values):
+                    return _not_modified(path, values) or await call(**values)
+            else:
+                def endpoint(**values):
+                    return _not_modified(path, values) or call(**values)
+            self.dependant.call = endpoint
+        return super().get_route_handler()
+
+class CatalogETagMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return await self.app(scope, receive, send)
+        # Read-your-writes requests may be ahead of the (replica's) version
+        if reads_from_primary(Request(scope)):
+            return await self.app(scope, receive, send)
+
+        # Taken before the route runs, so the body is never older than its tag
+        versions = cached_catalog_versions()
+        if versions is None:
+            versions = await run_in_threadpool(current_catalog_versions)
+        if_none_match = Headers(scope=scope).get("if-none-match")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                # The router has filled in scope["route"] by now
+                route = scope.get("route")
+                path = route.path if route is not None else None
+                headers = MutableHeaders(scope=message)
+                if path in VERSIONED_ROUTES and not headers.get("content-type", "").startswith(STREAMED_MEDIA_TYPE):
+                    etag, gzip_etag = _etags(path, versions)
+                    headers["ETag"] = gzip_etag if headers.get("content-encoding") == "gzip" else etag
+                    # Cacheable, but revalidated on every use
+                    headers["Cache-Control"] = "no-cache"
+            await send(message)
+
+        token = _conditional.set((versions, if_none_match) if if_none_match else None)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _conditional.reset(token)
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware with the thresholds from the environment, skipping the
+    bulk exports and /metrics."""
+
+    def __init__(self, app):
+        super().__init__(app, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_LEVEL)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(UNCOMPRESSED_PREFIXES):
+            return await self.app(scope, receive, send)
+        await super().__call__(scope, receive, send)
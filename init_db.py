@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from database import create_db_engine
 from models import Base
 
 load_dotenv()
@@ -9,7 +9,7 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL environment variable not set. Please check your .env file.")
 
-engine = create_engine(DATABASE_URL)
+engine = create_db_engine(DATABASE_URL)
 print("Dropping all tables...")
 Base.metadata.drop_all(engine)
 print("Creating tables...")
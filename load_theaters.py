@@ -1,9 +1,18 @@
+import argparse
+import hashlib
+import json
 import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import case, func, update
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.dialects.postgresql import insert
-from models import Base, Theater, Screen
+from database import create_db_engine, insert_on_conflict
+from models import Base, Theater, normalize_city
+from catalog import bump_catalog_version
+from populate_screens import reconcile_screens
 import requests
 import re
 
@@ -13,9 +22,13 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL environment variable not set. Please check your .env file.")
 
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
-session = Session()
+# Point OVERPASS_URL at a local stub server to drive the loader in tests
+OVERPASS_URL = os.getenv("OVERPASS_URL", "https://overpass-api.de/api/interpreter")
+# The public Overpass instance allows a couple of concurrent slots per client
+OVERPASS_WORKERS = int(os.getenv("OVERPASS_WORKERS", "2"))
+OVERPASS_TIMEOUT = float(os.getenv("OVERPASS_TIMEOUT", "60"))
+OVERPASS_MAX_RETRIES = int(os.getenv("OVERPASS_MAX_RETRIES", "4"))
+RETRY_STATUSES = {429, 502, 503, 504}
 
 AREAS = [
     #SEATTLE AREA
@@ -29,7 +42,6 @@ AREAS = [
     {"name": "Cambridge", "state": "MA", "country": "US"},
     {"name": "Somerville", "state": "MA", "country": "US"},
     {"name": "Brookline", "state": "MA", "country": "US"},
-    {"name": "Cambridge", "state": "MA", "country": "US"},
     #BAY AREA
     {"name": "San Francisco", "state": "CA", "country": "US"},
     {"name": "San Jose", "state": "CA", "country": "US"},
@@ -45,103 +57,261 @@ AREAS = [
     {"name": "Wayne", "state": "PA", "country": "US"},
     {"name": "Bala Cynwyd", "state": "PA", "country": "US"},
     {"name": "Langhorne", "state": "PA", "country": "US"},
-    {"name": "Bensalem", "state": "PA", "country": "US"},
+    # Bensalem is a township, not an admin_level=8 city, so also search around it
+    {"name": "Bensalem", "state": "PA", "country": "US", "around": (5000, 40.1251, -74.9545)},
 
 ]
 
-for area in AREAS:
-    query = f"""
+class OverpassError(Exception):
+    pass
+
+def build_query(area):
+    around = ""
+    if "around" in area:
+        radius, lat, lon = area["around"]
+        around = f"""
+      node["amenity"="cinema"](around:{radius},{lat},{lon});
+      way["amenity"="cinema"](around:{radius},{lat},{lon});
+      relation["amenity"="cinema"](around:{radius},{lat},{lon});"""
+    # "meta" adds each element's version, used by the incremental sync
+    return f"""
     [out:json][timeout:25];
     area["name"="{area['name']}"][admin_level=8]->.searchArea;
     (
       node["amenity"="cinema"](area.searchArea);
       way["amenity"="cinema"](area.searchArea);
-      relation["amenity"="cinema"](area.searchArea);
-      node["amenity"="cinema"](around:5000,40.1251,-74.9545);  // Bensalem coordinates
-      way["amenity"="cinema"](around:5000,40.1251,-74.9545);
-      relation["amenity"="cinema"](around:5000,40.1251,-74.9545);
+      relation["amenity"="cinema"](area.searchArea);{around}
     );
-    out center;
+    out center meta;
     """
 
-    response = requests.post("https://overpass-api.de/api/interpreter", data={"data": query})
-    elements = response.json().get("elements", [])
+def retry_delay(attempt, response=None):
+    # Honor Retry-After when Overpass sends one, else exponential backoff with jitter
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+    return min(60.0, 2 ** attempt) + random.uniform(0, 1)
+
+def fetch_area(area, url=OVERPASS_URL, http=requests, max_retries=OVERPASS_MAX_RETRIES, timeout=OVERPASS_TIMEOUT):
+    query = build_query(area)
+    for attempt in range(max_retries + 1):
+        try:
+            response = http.post(url, data={"data": query}, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == max_retries:
+                raise OverpassError(f"{area['name']}: {e}") from e
+            time.sleep(retry_delay(attempt))
+            continue
+
+        if response.status_code in RETRY_STATUSES and attempt < max_retries:
+            time.sleep(retry_delay(attempt, response))
+            continue
+        if response.status_code != 200:
+            raise OverpassError(f"{area['name']}: HTTP {response.status_code}")
+        try:
+            return response.json().get("elements", []), attempt + 1
+        except ValueError as e:
+            raise OverpassError(f"{area['name']}: invalid JSON response") from e
 
-    for el in elements:
-        tags = el.get("tags", {})
+def fetch_all(areas, url=OVERPASS_URL, workers=OVERPASS_WORKERS):
+    # Returns [(area, elements)] for the areas that succeeded, and the failures
+    def timed_fetch(area):
+        start = time.perf_counter()
+        try:
+            elements, attempts = fetch_area(area, url=url)
+        except OverpassError as e:
+            return area, None, time.perf_counter() - start, str(e)
+        return area, elements, time.perf_counter() - start, attempts
 
-        city = tags.get("addr:city") or area["name"]
-        state = tags.get("addr:state") or area["state"]
-        country = tags.get("addr:country") or area["country"]
+    start = time.perf_counter()
+    print(f"Fetching {len(areas)} areas from {url} with {workers} workers")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(timed_fetch, areas))
 
-        if "screen" in tags:
-            screens_count = int(tags["screen"])
-            screens_count_source = "osm_tag"
+    for area, elements, elapsed, detail in results:
+        if elements is None:
+            print(f"  {area['name']}, {area['state']}: FAILED after {elapsed:.2f}s ({detail})")
         else:
-            name = tags.get("name", "")
-            match = re.search(r'\b(\d{1,2})\b', name)
-            if match:
-                screens_count = int(match.group(1))
-                screens_count_source = "name_parse"
-            else:
-                screens_count = None
-                screens_count_source = None
-
-        insert_stmt = insert(Theater).values(
-            osm_id=el["id"],
-            name=tags.get("name"),
-            brand=tags.get("brand"),
-            operator=tags.get("operator"),
-            street=tags.get("addr:street"),
-            city=city,
-            state=state,
-            postcode=tags.get("addr:postcode"),
-            country=country,
-            lat=el.get("lat"),
-            lon=el.get("lon"),
-            website=tags.get("website"),
-            screens_count=screens_count,
-            screens_count_source=screens_count_source
-        )
+            print(f"  {area['name']}, {area['state']}: {len(elements)} elements in {elapsed:.2f}s (attempts: {detail})")
+    print(f"Fetched all areas in {time.perf_counter() - start:.2f}s "
+          f"(sum of per-area times: {sum(r[2] for r in results):.2f}s)")
 
-        update_fields = {
-            "name": insert_stmt.excluded.name,
-            "brand": insert_stmt.excluded.brand,
-            "operator": insert_stmt.excluded.operator,
-            "street": insert_stmt.excluded.street,
-            "city": insert_stmt.excluded.city,
-            "state": insert_stmt.excluded.state,
-            "postcode": insert_stmt.excluded.postcode,
-            "country": insert_stmt.excluded.country,
-            "lat": insert_stmt.excluded.lat,
-            "lon": insert_stmt.excluded.lon,
-            "website": insert_stmt.excluded.website,
-        }
+    fetched = [(area, elements) for area, elements, _, _ in results if elements is not None]
+    failed = [area for area, elements, _, _ in results if elements is None]
+    return fetched, failed
+
+UPSERT_CHUNK_SIZE = 1000
+
+def element_to_row(area, el):
+    tags = el.get("tags", {})
+
+    city = tags.get("addr:city") or area["name"]
+    state = tags.get("addr:state") or area["state"]
+    country = tags.get("addr:country") or area["country"]
+
+    if "screen" in tags:
+        screens_count = int(tags["screen"])
+        screens_count_source = "osm_tag"
+    else:
+        name = tags.get("name", "")
+        match = re.search(r'\b(\d{1,2})\b', name)
+        if match:
+            screens_count = int(match.group(1))
+            screens_count_source = "name_parse"
+        else:
+            screens_count = None
+            screens_count_source = None
+
+    return {
+        "osm_id": el["id"],
+        "name": tags.get("name"),
+        "brand": tags.get("brand"),
+        "operator": tags.get("operator"),
+        "street": tags.get("addr:street"),
+        "city": city,
+        "city_normalized": normalize_city(city),
+        "state": state,
+        "postcode": tags.get("addr:postcode"),
+        "country": country,
+        # Ways and relations only carry coordinates in their "center"
+        "lat": el.get("lat", el.get("center", {}).get("lat")),
+        "lon": el.get("lon", el.get("center", {}).get("lon")),
+        "website": tags.get("website"),
+        "screens_count": screens_count,
+        "screens_count_source": screens_count_source,
+    }
 
-        if screens_count is not None:
-            update_fields["screens_count"] = insert_stmt.excluded.screens_count
-            update_fields["screens_count_source"] = insert_stmt.excluded.screens_count_source
+def with_sync_fields(row, version):
+    # Hash of everything we store from the element, so unchanged rows can be skipped
+    content = json.dumps(row, sort_keys=True, default=str)
+    return {
+        **row,
+        "osm_version": version,
+        "content_hash": hashlib.sha1(content.encode()).hexdigest(),
+        "missing_since": None,
+    }
 
-        update_stmt = insert_stmt.on_conflict_do_update(
+def upsert_theaters(session, rows):
+    # Multi-row INSERT ... ON CONFLICT per chunk. Returns (inserted, updated).
+    inserted = updated = 0
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+        osm_ids = [row["osm_id"] for row in chunk]
+        existing = session.query(func.count(Theater.id)).filter(Theater.osm_id.in_(osm_ids)).scalar()
+
+        insert_stmt = insert_on_conflict(session, Theater).values(chunk)
+        excluded = insert_stmt.excluded
+        update_fields = {
+            "name": excluded.name,
+            "brand": excluded.brand,
+            "operator": excluded.operator,
+            "street": excluded.street,
+            "city": excluded.city,
+            "city_normalized": excluded.city_normalized,
+            "state": excluded.state,
+            "postcode": excluded.postcode,
+            "country": excluded.country,
+            "lat": excluded.lat,
+            "lon": excluded.lon,
+            "website": excluded.website,
+            "osm_version": excluded.osm_version,
+            "content_hash": excluded.content_hash,
+            "missing_since": excluded.missing_since,
+            # Only a real change moves updated_at, so search refreshes stay small
+            "updated_at": case(
+                (Theater.content_hash.is_distinct_from(excluded.content_hash), func.now()),
+                else_=Theater.updated_at,
+            ),
+            # An unknown count never overwrites a known one
+            "screens_count": func.coalesce(excluded.screens_count, Theater.screens_count),
+            "screens_count_source": case(
+                (excluded.screens_count.is_(None), Theater.screens_count_source),
+                else_=excluded.screens_count_source,
+            ),
+        }
+        session.execute(insert_stmt.on_conflict_do_update(
             index_elements=["osm_id"],
             set_=update_fields
+        ))
+        inserted += len(chunk) - existing
+        updated += existing
+    return inserted, updated
+
+def mark_missing(session, seen_osm_ids):
+    # Theaters no longer returned by Overpass are flagged, not deleted, since
+    # their screens may carry crowdsourced suggestions
+    existing = session.query(Theater.id, Theater.osm_id)\
+        .filter(Theater.missing_since.is_(None), Theater.osm_id.isnot(None))\
+        .all()
+    gone = [row.id for row in existing if row.osm_id not in seen_osm_ids]
+    for start in range(0, len(gone), UPSERT_CHUNK_SIZE):
+        session.execute(
+            update(Theater)
+            .where(Theater.id.in_(gone[start:start + UPSERT_CHUNK_SIZE]))
+            .values(missing_since=func.now())
         )
+    return len(gone)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load cinemas from OpenStreetMap via Overpass")
+    parser.add_argument("--overpass-url", default=OVERPASS_URL)
+    parser.add_argument("--workers", type=int, default=OVERPASS_WORKERS)
+    parser.add_argument("--incremental", action="store_true",
+                        help="only write theaters whose OSM data changed, and mark ones that disappeared")
+    args = parser.parse_args()
+
+    engine = create_db_engine(DATABASE_URL)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    fetched, failed = fetch_all(AREAS, url=args.overpass_url, workers=args.workers)
+
+    # Neighbouring areas return overlapping elements; ON CONFLICT cannot update
+    # one row twice per statement, so keep the last one seen (as before)
+    rows = {}
+    for area, elements in fetched:
+        for el in elements:
+            row = element_to_row(area, el)
+            rows[row["osm_id"]] = with_sync_fields(row, el.get("version"))
+    print(f"Fetched {len(rows)} distinct theaters")
+
+    changed = list(rows.values())
+    missing = 0
+    if args.incremental:
+        stored = {
+            r.osm_id: (r.content_hash, r.missing_since)
+            for r in session.query(Theater.osm_id, Theater.content_hash, Theater.missing_since)
+        }
+        # Skip rows whose content is unchanged, unless they were marked missing
+        changed = [
+            row for row in changed
+            if stored.get(row["osm_id"]) != (row["content_hash"], None)
+        ]
+        if failed:
+            print("Skipping missing-theater detection because some areas failed")
+        else:
+            missing = mark_missing(session, rows.keys())
+
+    inserted, updated = upsert_theaters(session, changed)
+    print(f"Theaters: {inserted} inserted, {updated} updated, "
+          f"{len(rows) - len(changed)} unchanged, {missing} marked missing")
+
+    # Now populate screens. Trimming screens whose count went down is left to
+    # populate_screens.py, as before.
+    added, _ = reconcile_screens(session, delete_excess=False)
+    print(f"Screens: {added} inserted")
 
-        session.execute(update_stmt)
+    if inserted or updated or missing or added:
+        # Let running API processes know their in-memory views (e.g. the nearby index) are stale
+        bump_catalog_version(session)
 
-# Now populate screens
-theaters_with_counts = session.query(Theater).filter(Theater.screens_count.isnot(None)).all()
+    session.commit()
+    session.close()
 
-for theater in theaters_with_counts:
-    existing = session.query(Screen).filter_by(theater_id=theater.id).count()
-    if existing == 0:
-        for n in range(1, theater.screens_count + 1):
-            screen = Screen(
-                theater_id=theater.id,
-                screen_number=n,
-                name=f"Screen {n}"
-            )
-            session.add(screen)
+    if failed:
+        print(f"Failed areas: {', '.join(area['name'] for area in failed)}")
+        sys.exit(1)
 
-session.commit()
-session.close()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
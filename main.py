@@ -1,15 +1,70 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from database import SessionLocal
-from models import Theater, Screen, BestSeatSuggestion
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from database import (
+    READ_YOUR_WRITES_COOKIE, READ_YOUR_WRITES_SECONDS, ReadSessionLocal, SessionLocal, env_flag,
+    prewarm_async_pool, prewarm_pool, read_engine, engine, reads_from_primary,
+)
+from models import Theater, Screen, SeatVote, normalize_city
+from consensus import store_suggestions
+from suggestion_buffer import SuggestionBuffer, WRITE_BEHIND_ENABLED
 from sqlalchemy import distinct
-from pydantic import BaseModel, validator
-from typing import List
+from pydantic import BaseModel, Field, validator
+from typing import List, Literal
+from contextlib import asynccontextmanager
+from cache import catalog_cache
+from cities import get_city_index
+from search import get_search_index
+from projections import BEST_SEAT, BEST_SEAT_VOTE, CITY_THEATER, SCREEN, THEATER_DETAIL, THEATER_SCREEN, THEATER_SUMMARY, StructResponse, encode_ndjson
+from catalog import current_catalog_versions
+from metrics import MetricsMiddleware, metrics_response
+from startup import StartupMiddleware, startup_report
+from http_cache import CatalogETagMiddleware, CatalogRoute, CompressionMiddleware
+from export import MEDIA_TYPES as EXPORT_MEDIA_TYPES, export_stream
 import re
 
-app = FastAPI()
+suggestion_buffer = SuggestionBuffer(SessionLocal) if WRITE_BEHIND_ENABLED else None
+
+ASYNC_READS = env_flag("ASYNC_READS")
+# Load the hot catalog queries into the cache before taking traffic
+STARTUP_PRELOAD = env_flag("STARTUP_PRELOAD", True)
+# The spatial index imports numpy and reads every theater; without this flag
+# it is built by the first /theaters/nearby request instead
+STARTUP_SPATIAL_INDEX = env_flag("STARTUP_SPATIAL_INDEX")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with startup_report.phase("pool_prewarm"):
+        prewarm_pool()
+        if ASYNC_READS:
+            await prewarm_async_pool()
+    if STARTUP_PRELOAD:
+        with startup_report.phase("preload"):
+            preload_catalog()
+    if STARTUP_SPATIAL_INDEX:
+        with startup_report.phase("spatial_index"):
+            from spatial import refresh_theater_index
+            refresh_theater_index()
+    if suggestion_buffer:
+        suggestion_buffer.start()
+    yield
+    if suggestion_buffer:
+        suggestion_buffer.stop()
+
+app = FastAPI(lifespan=lifespan)
+app.router.route_class = CatalogRoute
+
+if ASYNC_READS:
+    # Serve the single-object reads from the asyncpg engine instead of the threadpool
+    import async_reads
+    app.include_router(async_reads.router)
+
+
+app.add_middleware(CompressionMiddleware)
 
+# Outside compression, so it can tell the gzipped representation apart
+app.add_middleware(CatalogETagMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +74,11 @@ app.add_middleware(
     allow_headers=["*"],                      # Allow all headers (like Content-Type)
 )
 
+app.add_middleware(StartupMiddleware)
+
+# Outermost, so latency covers the CORS layer and streamed response bodies
+app.add_middleware(MetricsMiddleware)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -26,6 +86,113 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db(request: Request):
+    # GET routes read from the replica, unless this client just wrote
+    if reads_from_primary(request):
+        db = SessionLocal()
+        db.info["read_your_writes"] = True
+    else:
+        db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def cached(db, key, load):
+    # The catalog cache holds what the replica had; a read-your-writes request
+    # may be ahead of that, so it neither reads nor fills the cache
+    if db.info.get("read_your_writes"):
+        return load()
+    return catalog_cache.get_or_load(key, load)
+
+def remember_write(request: Request, response: Response):
+    if read_engine is engine:
+        return
+    # The frontend is cross-site, which needs SameSite=None, which needs Secure
+    secure = request.headers.get("x-forwarded-proto", request.url.scheme) == "https"
+    response.set_cookie(
+        READ_YOUR_WRITES_COOKIE, "1", max_age=READ_YOUR_WRITES_SECONDS,
+        httponly=True, secure=secure, samesite="none" if secure else "lax",
+    )
+
+MAX_PAGE_LIMIT = 1000
+# Theaters the loader flagged as gone upstream stay reachable by id (their
+# screens carry suggestions) but drop out of every listing
+LISTED_THEATERS = (Theater.missing_since.is_(None),)
+STREAM_CHUNK_SIZE = 500
+
+def parse_fields(fields: str | None, allowed):
+    # fields=id,name -> ["id", "name"]; None means "return everything"
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {unknown}. Allowed fields: {list(allowed)}"
+        )
+    return requested
+
+def keyset_page(query, key_column, after: int | None, limit: int | None):
+    # Keyset pagination: seek past the last id seen instead of OFFSET
+    query = query.order_by(key_column)
+    if after is not None:
+        query = query.filter(key_column > after)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def stream_ndjson(projection, where, selected, after, limit):
+    # Walks the table in keyset chunks on its own session, so the request
+    # session can be released and memory stays bounded by STREAM_CHUNK_SIZE
+    def generate():
+        db = ReadSessionLocal()
+        try:
+            last_id = after
+            remaining = limit
+            while remaining is None or remaining > 0:
+                chunk_size = STREAM_CHUNK_SIZE if remaining is None else min(STREAM_CHUNK_SIZE, remaining)
+                query = projection.query(db, selected).filter(*where)
+                rows = keyset_page(query, projection.key, last_id, chunk_size)
+                if not rows:
+                    break
+                yield encode_ndjson([projection.serialize(r, selected) for r in rows])
+                last_id = rows[-1].id
+                if remaining is not None:
+                    remaining -= len(rows)
+                if len(rows) < chunk_size:
+                    break
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+def load_page(db, projection, where, selected, after, limit, cache_key=None):
+    # Only the columns behind the returned (or ?fields=-selected) fields are queried
+    def load():
+        query = projection.query(db, selected).filter(*where)
+        rows = keyset_page(query, projection.key, after, limit)
+        next_after = rows[-1].id if limit is not None and len(rows) == limit else None
+        return [projection.serialize(r, selected) for r in rows], next_after
+
+    if cache_key is None:
+        return load()
+    return cached(db, (cache_key, tuple(selected or ()), after, limit), load)
+
+def list_response(db, projection, where, fields, after, limit, format, cache_key=None):
+    selected = parse_fields(fields, projection.names)
+    if format == "ndjson":
+        return stream_ndjson(projection, where, selected, after, limit)
+
+    items, next_after = load_page(db, projection, where, selected, after, limit, cache_key)
+    # Encoded straight from the structs; FastAPI's jsonable_encoder is skipped
+    response = StructResponse(items)
+    if next_after is not None:
+        # Clients pass this back as ?after= to fetch the next page
+        response.headers["X-Next-After"] = str(next_after)
+    return response
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to BestSeat!"}
@@ -34,145 +201,150 @@ def read_root():
 def healthz():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return metrics_response()
+
 @app.get("/theaters")
-def get_theaters(db: Session = Depends(get_db)):
-    theaters = db.query(Theater).all()
+def get_theaters(
+    after: int | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    fields: str | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: Session = Depends(get_read_db),
+):
+    return list_response(
+        db, THEATER_SUMMARY, LISTED_THEATERS, fields, after, limit, format, cache_key="theaters"
+    )
+
+@app.get("/theaters/nearby")
+def get_nearby_theaters(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(25, gt=0, le=500),
+    k: int = Query(10, ge=1, le=100),
+):
+    # Served entirely from the in-process grid index, no table scan
+    from spatial import get_theater_index
+    index = get_theater_index()
     return [
-        {
-            "id": t.id,
-            "name": t.name,
-            "brand": t.brand,
-            "city": t.city,
-            "state": t.state,
-            "country": t.country,
-            "street": t.street,
-            "postcode": t.postcode,
-            "address": {
-                "street": t.street,
-                "city": t.city,
-                "state": t.state,
-                "postcode": t.postcode,
-                "country": t.country
-            },
-            "screens_count": t.screens_count,
-        }
-        for t in theaters
+        {**theater, "distance_km": round(distance, 3)}
+        for theater, distance in index.nearest(lat, lon, radius_km, k)
     ]
 
-@app.get("/theaters/{theater_id}")
-def get_theater(theater_id: int, db: Session = Depends(get_db)):
-    theater = db.query(Theater).filter(Theater.id == theater_id).first()
+def load_theater_with_screens(db, theater_id):
+    # Theater and its screens in one round trip (LEFT OUTER JOIN)
+    theater = db.query(Theater)\
+        .options(
+            load_only(*THEATER_DETAIL.columns()),
+            joinedload(Theater.screens).load_only(*THEATER_SCREEN.columns()),
+        )\
+        .filter(Theater.id == theater_id)\
+        .one_or_none()
     if not theater:
         raise HTTPException(status_code=404, detail="Theater not found")
-    screens = db.query(Screen).filter(Screen.theater_id == theater_id).all()
-    return {
-        "id": theater.id,
-        "name": theater.name,
-        "brand": theater.brand,
-        "address": {
-            "street": theater.street,
-            "city": theater.city,
-            "state": theater.state,
-            "postcode": theater.postcode,
-            "country": theater.country
-        },
-        "lat": theater.lat,
-        "lon": theater.lon,
-        "screens_count": theater.screens_count,
-        "screens_count_source": theater.screens_count_source,
-        "screens": [
-            {
-                "id": screen.id,
-                "name": screen.name,
-                "screen_number": screen.screen_number,
-                "is_imax": screen.is_imax,
-                "best_seat": screen.best_seat,
-                "notes": screen.notes
-            }
-            for screen in screens
-        ]
-    }
+    return theater
 
-@app.get("/cities")
-def get_cities(db: Session = Depends(get_db)):
-    cities = db.query(distinct(Theater.city)).filter(Theater.city.isnot(None)).all()
+MAX_BATCH_IDS = 100
+
+@app.get("/theaters/batch")
+def get_theaters_batch(ids: str = Query(..., description="Comma-separated theater ids"), db: Session = Depends(get_read_db)):
+    try:
+        theater_ids = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if not theater_ids or len(theater_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"Pass between 1 and {MAX_BATCH_IDS} ids")
+
+    # Two queries however many ids: the theaters, then all of their screens
+    theaters = db.query(Theater)\
+        .options(
+            load_only(*THEATER_DETAIL.columns()),
+            selectinload(Theater.screens).load_only(*THEATER_SCREEN.columns()),
+        )\
+        .filter(Theater.id.in_(theater_ids))\
+        .all()
+    by_id = {t.id: t for t in theaters}
+    # Requested order; unknown ids are left out
+    return StructResponse([THEATER_DETAIL.serialize(by_id[i]) for i in theater_ids if i in by_id])
+
+@app.get("/theaters/{theater_id}")
+def get_theater(theater_id: int, db: Session = Depends(get_read_db)):
+    return StructResponse(cached(
+        db,
+        ("theater", theater_id),
+        lambda: THEATER_DETAIL.serialize(load_theater_with_screens(db, theater_id))
+    ))
+
+def load_cities(db):
+    cities = db.query(distinct(Theater.city)).filter(Theater.city.isnot(None), *LISTED_THEATERS).all()
     return [city[0] for city in cities]
 
+@app.get("/cities")
+def get_cities(db: Session = Depends(get_read_db)):
+    return StructResponse(cached(db, ("cities",), lambda: load_cities(db)))
+
+@app.get("/cities/suggest")
+def suggest_cities(prefix: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    # Typeahead: served from the in-memory sorted city list
+    return get_city_index().suggest(prefix, limit)
+
+@app.get("/search")
+def search_theaters(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(10, ge=1, le=50)):
+    # Search-as-you-type: served from the in-memory index, which only goes to
+    # the database when the catalog version moves
+    return StructResponse(get_search_index().search(q, limit))
+
 @app.get("/theaters/by_city/{city}")
-def get_theaters_by_city(city: str, db: Session = Depends(get_db)):
-    # First, let's see what cities we actually have
-    all_cities = db.query(distinct(Theater.city)).filter(Theater.city.isnot(None)).all()
-    print(f"Available cities in DB: {[c[0] for c in all_cities]}")
-    print(f"Searching for city: {city}")
-    
-    # Use case-insensitive search
-    theaters = db.query(Theater).filter(Theater.city.ilike(city)).all()
-    if not theaters:
+def get_theaters_by_city(
+    city: str,
+    after: int | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    fields: str | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: Session = Depends(get_read_db),
+):
+    # Equality on the indexed, normalized column instead of an ILIKE scan
+    city_key = normalize_city(city)
+    where = (Theater.city_normalized == city_key, *LISTED_THEATERS)
+    if after is None and not db.query(Theater.id).filter(*where).first():
         raise HTTPException(
             status_code=404, 
-            detail=f"No theaters found in {city}. Available cities: {[c[0] for c in all_cities]}"
+            detail=f"No theaters found in {city}. Available cities: {get_city_index().names}"
         )
-    return [
-        {
-            "id": t.id,
-            "name": t.name,
-            "brand": t.brand,
-            "street": t.street,
-            "state": t.state,
-            "postcode": t.postcode,
-            "screens_count": t.screens_count,
-        }
-        for t in theaters
-    ]
+    return list_response(
+        db, CITY_THEATER, where, fields, after, limit, format
+    )
 
 @app.get("/screens")
-def get_screens(db: Session = Depends(get_db)):
-    screens = db.query(Screen).all()
-    return [
-        {
-            "id": screen.id,
-            "theater_id": screen.theater_id,
-            "name": screen.name,
-            "screen_number": screen.screen_number,
-            "is_imax": screen.is_imax,
-            "best_seat": screen.best_seat,
-            "notes": screen.notes
-        }
-        for screen in screens
-    ]
+def get_screens(
+    after: int | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    fields: str | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: Session = Depends(get_read_db),
+):
+    return list_response(
+        db, SCREEN, (), fields, after, limit, format, cache_key="screens"
+    )
 
 @app.get("/screens/{screen_id}")
-def get_screen(screen_id: int, db: Session = Depends(get_db)):
-    screen = db.query(Screen).filter(Screen.id == screen_id).first()
+def get_screen(screen_id: int, db: Session = Depends(get_read_db)):
+    screen = SCREEN.query(db).filter(Screen.id == screen_id).first()
     if not screen:
         raise HTTPException(status_code=404, detail="Screen not found")
-    return {
-        "id": screen.id,
-        "theater_id": screen.theater_id,
-        "name": screen.name,
-        "screen_number": screen.screen_number,
-        "is_imax": screen.is_imax,
-        "best_seat": screen.best_seat,
-        "notes": screen.notes
-    }
+    return StructResponse(SCREEN.serialize(screen))
 
 @app.get("/theaters/{theater_id}/screens")
-def get_theater_screens(theater_id: int, db: Session = Depends(get_db)):
-    theater = db.query(Theater).filter(Theater.id == theater_id).first()
-    if not theater:
-        raise HTTPException(status_code=404, detail="Theater not found")
-    screens = db.query(Screen).filter(Screen.theater_id == theater_id).all()
-    return [
-        {
-            "id": screen.id,
-            "name": screen.name,
-            "screen_number": screen.screen_number,
-            "is_imax": screen.is_imax,
-            "best_seat": screen.best_seat,
-            "notes": screen.notes
-        }
-        for screen in screens
-    ]
+def get_theater_screens(theater_id: int, db: Session = Depends(get_read_db)):
+    return StructResponse(cached(
+        db,
+        ("theater_screens", theater_id),
+        lambda: [THEATER_SCREEN.serialize(s) for s in load_theater_with_screens(db, theater_id).screens]
+    ))
+
+# Seat numbers above this are rejected; the heatmap grid is sized by them
+MAX_SEAT_NUMBER = 100
 
 class BestSeatInput(BaseModel):
     suggested_seat: str
@@ -183,40 +355,169 @@ class BestSeatInput(BaseModel):
         # Validate seat format: letter followed by number (e.g., F10)
         if not re.match(r'^[A-Za-z][0-9]+$', v):
             raise ValueError('Invalid seat format. Please use format like "F10" (letter followed by number)')
+        if not 1 <= int(v[1:]) <= MAX_SEAT_NUMBER:
+            raise ValueError(f'Seat number must be between 1 and {MAX_SEAT_NUMBER}')
         return v.upper()  # Convert to uppercase for consistency
 
+# Group sizes precomputed together the first time a screen's blocks are requested
+COMMON_GROUP_SIZES = range(2, 7)
+MAX_GROUP_SIZE = 20
+
+def load_seat_blocks(db, screen_id):
+    # numpy-backed, so imported on first use rather than at startup
+    from seating import best_block, parse_layout, score_seat_maps
+    screen = db.query(Screen.layout_json, Screen.is_imax).filter(Screen.id == screen_id).first()
+    if not screen:
+        raise HTTPException(status_code=404, detail="Screen not found")
+    try:
+        seat_map = parse_layout(screen.layout_json)
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=404, detail="No seat layout available for this screen")
+    scores = score_seat_maps([seat_map], [screen.is_imax])[0]
+    return {
+        "seat_map": seat_map,
+        "scores": scores,
+        "blocks": {size: best_block(seat_map, scores, size) for size in COMMON_GROUP_SIZES},
+    }
+
+@app.get("/screens/{screen_id}/best_block")
+def get_best_block(screen_id: int, size: int = Query(..., ge=1, le=MAX_GROUP_SIZE), db: Session = Depends(get_read_db)):
+    seats = cached(db, ("seat_blocks", screen_id), lambda: load_seat_blocks(db, screen_id))
+    if size in seats["blocks"]:
+        block = seats["blocks"][size]
+    else:
+        from seating import best_block
+        block = best_block(seats["seat_map"], seats["scores"], size)
+    if block is None:
+        raise HTTPException(status_code=404, detail=f"No {size} adjacent seats available in one row")
+    return block
+
+SEAT_PATTERN = re.compile(r'^([A-Z])([0-9]+)$')
+
+@app.get("/screens/{screen_id}/heatmap")
+def get_seat_heatmap(screen_id: int, db: Session = Depends(get_read_db)):
+    # Built from the seat_votes rollup (updated on every suggestion insert),
+    # so this reads one row per voted seat rather than every suggestion
+    def load():
+        tallies = db.query(SeatVote.seat, SeatVote.votes).filter(SeatVote.screen_id == screen_id).all()
+        if not tallies and not db.query(Screen.id).filter(Screen.id == screen_id).first():
+            raise HTTPException(status_code=404, detail="Screen not found")
+
+        cells = []
+        for seat, votes in tallies:
+            match = SEAT_PATTERN.match(seat)
+            # Votes stored before MAX_SEAT_NUMBER was enforced are left out
+            # rather than sizing the grid
+            if match and 1 <= int(match.group(2)) <= MAX_SEAT_NUMBER:
+                cells.append((ord(match.group(1)) - ord("A"), int(match.group(2)), votes))
+        if not cells:
+            return {"row_labels": [], "seat_numbers": [], "counts": [], "total_votes": 0}
+
+        # Dense grid: rows A..last voted row, columns seat 1..highest voted seat
+        import numpy as np
+        num_rows = max(row for row, _, _ in cells) + 1
+        num_seats = max(number for _, number, _ in cells)
+        counts = np.zeros((num_rows, num_seats), dtype=np.int64)
+        for row, number, votes in cells:
+            counts[row, number - 1] += votes
+        return {
+            "row_labels": [chr(ord("A") + r) for r in range(num_rows)],
+            "seat_numbers": list(range(1, num_seats + 1)),
+            "counts": counts.tolist(),
+            "total_votes": int(counts.sum()),
+        }
+
+    return cached(db, ("heatmap", screen_id), load)
+
+MAX_SUGGESTION_BATCH = 1000
+
+class BestSeatBatchItem(BestSeatInput):
+    screen_id: int
+
+class BestSeatBatchInput(BaseModel):
+    suggestions: List[BestSeatBatchItem] = Field(..., min_length=1, max_length=MAX_SUGGESTION_BATCH)
+
 @app.post("/screens/{screen_id}/suggest_best_seat")
-def submit_best_seat(screen_id: int, data: BestSeatInput, db: Session = Depends(get_db)):
-    screen = db.query(Screen).filter(Screen.id == screen_id).first()
+def submit_best_seat(screen_id: int, data: BestSeatInput, request: Request, response: Response, db: Session = Depends(get_db)):
+    screen = db.query(Screen.id).filter(Screen.id == screen_id).first()
     if not screen:
         raise HTTPException(status_code=404, detail="Screen not found")
 
-    suggestion = BestSeatSuggestion(
-        screen_id=screen_id,
-        suggested_seat=data.suggested_seat,
-        user_notes=data.user_notes,
-    )
-    db.add(suggestion)
+    suggestion = {
+        "screen_id": screen_id,
+        "suggested_seat": data.suggested_seat,
+        "user_notes": data.user_notes,
+    }
+    remember_write(request, response)
+    # Validated above; the INSERT happens on the next buffer flush
+    if suggestion_buffer and suggestion_buffer.add(suggestion):
+        response.status_code = 202
+        return {"message": "Thank you for your suggestion!", "suggestion_id": None}
+
+    # Tally update commits atomically with the suggestion (also the path
+    # when the write-behind buffer is full)
+    suggestion_id = store_suggestions(db, [suggestion])[0]
     db.commit()
-    db.refresh(suggestion)
-    return {"message": "Thank you for your suggestion!", "suggestion_id": suggestion.id}
+    # best_seat changed: drop this process's vote-dependent cached responses now
+    current_catalog_versions(force=True)
+    return {"message": "Thank you for your suggestion!", "suggestion_id": suggestion_id}
+
+@app.post("/suggestions/batch")
+def submit_best_seat_batch(data: BestSeatBatchInput, request: Request, response: Response, db: Session = Depends(get_db)):
+    screen_ids = {s.screen_id for s in data.suggestions}
+    found = {row.id for row in db.query(Screen.id).filter(Screen.id.in_(screen_ids))}
+    missing = sorted(screen_ids - found)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Screens not found: {missing}")
+
+    suggestions = [
+        {
+            "screen_id": s.screen_id,
+            "suggested_seat": s.suggested_seat,
+            "user_notes": s.user_notes,
+        }
+        for s in data.suggestions
+    ]
+    suggestion_ids = store_suggestions(db, suggestions)
+    db.commit()
+    current_catalog_versions(force=True)
+    remember_write(request, response)
+    return {"message": "Thank you for your suggestions!", "suggestion_ids": suggestion_ids}
 
 @app.get("/screens/{screen_id}/best_seat")
-def get_best_seat_suggestion(screen_id: int, db: Session = Depends(get_db)):
-    # Get the most recent suggestion for this screen
-    suggestion = db.query(BestSeatSuggestion)\
-        .filter(BestSeatSuggestion.screen_id == screen_id)\
-        .order_by(BestSeatSuggestion.timestamp.desc())\
+def get_best_seat_suggestion(screen_id: int, db: Session = Depends(get_read_db)):
+    # Consensus seat is kept on the screen row by record_votes, so this is a
+    # primary-key lookup regardless of how many suggestions exist
+    best = BEST_SEAT.query(db)\
+        .outerjoin(SeatVote, BEST_SEAT_VOTE)\
+        .filter(Screen.id == screen_id)\
         .first()
-    
-    if not suggestion:
+
+    if not best or not (best.best_seat or best.computed_best_seat):
         raise HTTPException(status_code=404, detail="No best seat suggestions found for this screen")
-    
-    return {
-        "suggested_seat": suggestion.suggested_seat,
-        "user_notes": suggestion.user_notes,
-        "timestamp": suggestion.timestamp
-    }
+    return StructResponse(BEST_SEAT.serialize(best))
+
+@app.get("/export/{table}.{format}")
+def export_table(table: Literal["theaters", "screens", "suggestions"], format: Literal["parquet", "arrow", "ndjson"]):
+    # Chunks come off a server-side cursor on export's own connection, so
+    # memory stays bounded however big the table is
+    return StreamingResponse(
+        export_stream(table, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
+
+def preload_catalog():
+    # What the frontend asks for first: the city list and the full theater list
+    get_city_index()
+    db = ReadSessionLocal()
+    try:
+        cached(db, ("cities",), lambda: load_cities(db))
+        load_page(db, THEATER_SUMMARY, LISTED_THEATERS, None, None, None, cache_key="theaters")
+    finally:
+        db.close()
+
+startup_report.mark("import")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,177 @@
+"""Prometheus instrumentation: per-route latency and in-flight requests, SQL
+statements per request, connection-pool checkout waits, slow queries and the
+catalog cache counters. main.py serves all of it on /metrics."""
+import logging
+import os
+import time
+import weakref
+from contextvars import ContextVar
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency, until the last body byte is sent",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served", ["method"])
+REQUEST_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements executed per request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250),
+)
+STATEMENT_SECONDS = Histogram("db_statement_duration_seconds", "SQL statement execution time")
+SLOW_QUERIES = Counter("db_slow_queries_total", f"SQL statements slower than SLOW_QUERY_MS ({SLOW_QUERY_MS:g} ms)")
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection (including connecting)", ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+class RequestStats:
+    __slots__ = ("scope", "statements")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.statements = 0
+
+# Set per request by MetricsMiddleware. The object is shared with the copied
+# contexts that sync routes run in on the threadpool, so their counts land here.
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+def _route_label(scope):
+    route = scope.get("route")
+    # Unmatched paths share one label so 404 scans can't blow up cardinality
+    return route.path if route is not None else "unmatched"
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            _request_stats.reset(token)
+            route = _route_label(scope)
+            REQUEST_SECONDS.labels(method, route, str(status)).observe(elapsed)
+            REQUEST_STATEMENTS.labels(method, route).observe(stats.statements)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    STATEMENT_SECONDS.observe(elapsed)
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc()
+        stats = _request_stats.get()
+        logger.warning(
+            "Slow query (%.0f ms)%s: %s", elapsed * 1000,
+            f" in {stats.scope['method']} {_route_label(stats.scope)}" if stats is not None else "",
+            " ".join(statement.split())[:1000],
+        )
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute doesn't fire for a failed statement. (The context's
+    # cursor slot is never filled in, so go by the execution context.)
+    if exception_context.connection is not None and exception_context.execution_context is not None:
+        starts = exception_context.connection.info.get("query_start")
+        if starts:
+            starts.pop()
+
+_pools = weakref.WeakSet()
+
+class _TimedCheckout:
+    pool_label = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _pools.add(self)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT_SECONDS.labels(self.pool_label).observe(time.perf_counter() - start)
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+    pool_label = "sync"
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pool_label = "async"
+
+# Replica pools (DATABASE_READ_URL) get their own labels
+class TimedReadQueuePool(TimedQueuePool):
+    pool_label = "sync_read"
+
+class TimedAsyncReadQueuePool(TimedAsyncQueuePool):
+    pool_label = "async_read"
+
+class _StateCollector:
+    # Read at scrape time rather than updated on every request
+    def describe(self):
+        # Lets the registry check names without collecting (cache.py isn't importable yet)
+        yield GaugeMetricFamily("catalog_cache_entries", "")
+        for name in ("hits", "misses", "coalesced"):
+            yield CounterMetricFamily(f"catalog_cache_{name}", "")
+        yield GaugeMetricFamily("db_pool_checked_out", "")
+        yield GaugeMetricFamily("db_pool_overflow", "")
+
+    def collect(self):
+        from cache import catalog_cache
+
+        stats = catalog_cache.stats()
+        yield GaugeMetricFamily("catalog_cache_entries", "Entries in the catalog response cache", value=stats["entries"])
+        for name in ("hits", "misses", "coalesced"):
+            yield CounterMetricFamily(f"catalog_cache_{name}", f"Catalog cache {name}", value=stats[name])
+
+        # A disposed engine leaves its old pool around until collected, so sum per label
+        totals = {}
+        for pool in list(_pools):
+            checked_out, overflow = totals.get(pool.pool_label, (0, 0))
+            totals[pool.pool_label] = (checked_out + pool.checkedout(), overflow + max(pool.overflow(), 0))
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Connections checked out of the pool", labels=["pool"])
+        overflow = GaugeMetricFamily("db_pool_overflow", "Connections open beyond pool_size", labels=["pool"])
+        for label, (label_checked_out, label_overflow) in totals.items():
+            checked_out.add_metric([label], label_checked_out)
+            overflow.add_metric([label], label_overflow)
+        yield checked_out
+        yield overflow
+
+REGISTRY.register(_StateCollector())
+
+def metrics_response():
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -1,6 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, BigInteger, ForeignKey, Boolean, DateTime, func
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy import JSON, Column, Integer, String, Float, BigInteger, ForeignKey, Boolean, DateTime, Index, func
+from sqlalchemy.orm import deferred, relationship
 from database import Base  
 
 class Theater(Base):
@@ -11,7 +10,9 @@ class Theater(Base):
     brand = Column(String)
     operator = Column(String)
     street = Column(String)
-    city = Column(String)
+    city = Column(String, index=True)
+    # normalize_city(city); what /theaters/by_city matches on
+    city_normalized = Column(String, index=True)
     state = Column(String)
     postcode = Column(String)
     country = Column(String)
@@ -20,10 +21,24 @@ class Theater(Base):
     website = Column(String)
     screens_count = Column(Integer)
     screens_count_source = Column(String)
-    screens = relationship("Screen", back_populates="theater", cascade="all, delete")
+    # Incremental sync bookkeeping (see load_theaters.py --incremental)
+    osm_version = Column(Integer)
+    content_hash = Column(String)
+    missing_since = Column(DateTime)
+    # Set when a loader changes the row; search.py refreshes from it incrementally
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
+    screens = relationship("Screen", back_populates="theater", cascade="all, delete", order_by="Screen.screen_number")
+
+def normalize_city(city):
+    # Keep in sync with the lower(trim(city)) backfill in the migration
+    return city.strip().lower() if city else None
 
 class BestSeatSuggestion(Base):
     __tablename__ = "best_seat_suggestions"
+    __table_args__ = (
+        # A screen's suggestion history, newest last
+        Index("ix_best_seat_suggestions_screen_id_timestamp", "screen_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True)
     screen_id = Column(Integer, ForeignKey("screens.id"), nullable=False)
@@ -35,14 +50,48 @@ class BestSeatSuggestion(Base):
 
 class Screen(Base):
     __tablename__ = "screens"
+    __table_args__ = (
+        # Theater.screens (ordered by screen_number) and the screen reconciliation
+        Index("ix_screens_theater_id_screen_number", "theater_id", "screen_number"),
+    )
     id = Column(Integer, primary_key=True)
     theater_id = Column(Integer, ForeignKey("theaters.id"), nullable=False)
     screen_number = Column(Integer, nullable=False)
     name = Column(String)
     is_imax = Column(Boolean)
-    layout_json = Column(JSON)
+    # Deferred: only seat scoring needs it, list/detail reads never load the blob
+    layout_json = deferred(Column(JSON))
     best_seat = Column(String)
+    # Highest-scoring seat from layout_json (score_seats.py); used until there are votes
+    computed_best_seat = Column(String)
     notes = Column(String)
 
     theater = relationship("Theater", back_populates="screens")
-    suggestions = relationship("BestSeatSuggestion", back_populates="screen", cascade="all, delete")
\ No newline at end of file
+    suggestions = relationship("BestSeatSuggestion", back_populates="screen", cascade="all, delete")
+    seat_votes = relationship("SeatVote", back_populates="screen", cascade="all, delete")
+
+class SeatVote(Base):
+    __tablename__ = "seat_votes"
+    # Running tally of suggestions per (screen, seat); Screen.best_seat is the top score
+    screen_id = Column(Integer, ForeignKey("screens.id"), primary_key=True)
+    seat = Column(String, primary_key=True)
+    votes = Column(Integer, nullable=False, default=0)
+    # ln of the summed (decayed) vote weights; see consensus.vote_log_weight
+    score = Column(Float, nullable=False, default=0)
+    last_notes = Column(String)
+    last_voted_at = Column(DateTime)
+
+    screen = relationship("Screen", back_populates="seat_votes")
+
+# best_seat_subquery(): a screen's top tally is the first entry of this index
+Index("ix_seat_votes_screen_id_score", SeatVote.screen_id, SeatVote.score.desc(), SeatVote.last_voted_at.desc())
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_version"
+    # Single row (id=1) bumped by the loaders and by writes, so API processes
+    # know when their in-memory views of the catalog are stale
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    # Bumped by suggestion writes instead, which only move vote-derived fields
+    votes_version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
\ No newline at end of file
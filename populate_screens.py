@@ -1,8 +1,10 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import String, cast, delete, func, insert, literal, select
 from sqlalchemy.orm import sessionmaker
-from models import Base, Theater, Screen
+from database import create_db_engine
+from models import Base, Theater, Screen, BestSeatSuggestion, SeatVote
+from catalog import bump_catalog_version
 
 load_dotenv()
 
@@ -10,36 +12,50 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL environment variable not set. Please check your .env file.")
 
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
-session = Session()
-
-# Step 1: Find all theaters with a known screen count
-theaters_with_screens = session.query(Theater).filter(Theater.screens_count.isnot(None)).all()
-
-for theater in theaters_with_screens:
-    # Get existing screens for the current theater
-    existing_screens = session.query(Screen).filter_by(theater_id=theater.id).order_by(Screen.screen_number).all()
-    num_existing_screens = len(existing_screens)
-    desired_screens_count = theater.screens_count or 0  # Default to 0 if screens_count is None
-
-    # Case 1: Add new screens if screens_count increased
-    if num_existing_screens < desired_screens_count:
-        for n in range(num_existing_screens + 1, desired_screens_count + 1):
-            screen = Screen(
-                theater_id=theater.id,
-                screen_number=n,
-                name=f"Screen {n}"
-            )
-            session.add(screen)
-        print(f"Added {desired_screens_count - num_existing_screens} screens for Theater ID: {theater.id}")
-
-    # Case 2: Delete excess screens if screens_count decreased
-    elif num_existing_screens > desired_screens_count:
-        screens_to_delete = existing_screens[desired_screens_count:]
-        for screen in screens_to_delete:
-            session.delete(screen)
-        print(f"Deleted {num_existing_screens - desired_screens_count} screens for Theater ID: {theater.id}")
-
-session.commit()
-session.close()
\ No newline at end of file
+def reconcile_screens(session, delete_excess=True):
+    # Brings every theater with a known screen count to screens 1..screens_count
+    # using set-based statements instead of per-theater queries.
+    # Returns (screens added, screens deleted).
+    max_count = session.query(func.max(Theater.screens_count)).scalar()
+    if not max_count:
+        return 0, 0
+
+    deleted = 0
+    if delete_excess:
+        # Screens numbered past their theater's count, along with their votes
+        excess = select(Screen.id)\
+            .join(Theater, Theater.id == Screen.theater_id)\
+            .where(Theater.screens_count.isnot(None), Screen.screen_number > Theater.screens_count)
+        no_sync = {"synchronize_session": False}
+        session.execute(delete(SeatVote).where(SeatVote.screen_id.in_(excess)), execution_options=no_sync)
+        session.execute(delete(BestSeatSuggestion).where(BestSeatSuggestion.screen_id.in_(excess)), execution_options=no_sync)
+        deleted = session.execute(delete(Screen).where(Screen.id.in_(excess)), execution_options=no_sync).rowcount
+
+    # Numbers 1..max_count, joined against each theater's count
+    numbers = select(literal(1).label("n")).cte("numbers", recursive=True)
+    numbers = numbers.union_all(select(numbers.c.n + 1).where(numbers.c.n < max_count))
+    existing = select(Screen.id).where(Screen.theater_id == Theater.id, Screen.screen_number == numbers.c.n)
+    missing = select(Theater.id, numbers.c.n, literal("Screen ") + cast(numbers.c.n, String))\
+        .join(numbers, numbers.c.n <= Theater.screens_count)\
+        .where(Theater.screens_count.isnot(None), ~existing.exists())
+    added = len(session.execute(
+        insert(Screen).from_select(["theater_id", "screen_number", "name"], missing).returning(Screen.id)
+    ).all())
+
+    return added, deleted
+
+def main():
+    engine = create_db_engine(DATABASE_URL)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    added, deleted = reconcile_screens(session)
+    print(f"Added {added} screens, deleted {deleted} screens")
+
+    bump_catalog_version(session)
+
+    session.commit()
+    session.close()
+
+if __name__ == "__main__":
+    main()
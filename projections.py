@@ -0,0 +1,206 @@
+from datetime import datetime
+import msgspec
+from msgspec import UNSET, UnsetType
+from sqlalchemy import and_
+from starlette.responses import Response
+from models import Theater, Screen, SeatVote
+
+# Typed response bodies. Every field defaults to UNSET so a ?fields= subset
+# simply leaves the rest out of the encoded JSON.
+class Address(msgspec.Struct):
+    street: str | None
+    city: str | None
+    state: str | None
+    postcode: str | None
+    country: str | None
+
+class TheaterSummary(msgspec.Struct):
+    id: int | UnsetType = UNSET
+    name: str | None | UnsetType = UNSET
+    brand: str | None | UnsetType = UNSET
+    city: str | None | UnsetType = UNSET
+    state: str | None | UnsetType = UNSET
+    country: str | None | UnsetType = UNSET
+    street: str | None | UnsetType = UNSET
+    postcode: str | None | UnsetType = UNSET
+    address: Address | UnsetType = UNSET
+    screens_count: int | None | UnsetType = UNSET
+
+class CityTheater(msgspec.Struct):
+    id: int | UnsetType = UNSET
+    name: str | None | UnsetType = UNSET
+    brand: str | None | UnsetType = UNSET
+    street: str | None | UnsetType = UNSET
+    state: str | None | UnsetType = UNSET
+    postcode: str | None | UnsetType = UNSET
+    screens_count: int | None | UnsetType = UNSET
+
+class ScreenSummary(msgspec.Struct):
+    id: int | UnsetType = UNSET
+    theater_id: int | UnsetType = UNSET
+    name: str | None | UnsetType = UNSET
+    screen_number: int | None | UnsetType = UNSET
+    is_imax: bool | None | UnsetType = UNSET
+    best_seat: str | None | UnsetType = UNSET
+    notes: str | None | UnsetType = UNSET
+
+class TheaterScreen(msgspec.Struct):
+    id: int | UnsetType = UNSET
+    name: str | None | UnsetType = UNSET
+    screen_number: int | None | UnsetType = UNSET
+    is_imax: bool | None | UnsetType = UNSET
+    best_seat: str | None | UnsetType = UNSET
+    notes: str | None | UnsetType = UNSET
+
+class TheaterDetail(msgspec.Struct):
+    id: int | UnsetType = UNSET
+    name: str | None | UnsetType = UNSET
+    brand: str | None | UnsetType = UNSET
+    address: Address | UnsetType = UNSET
+    lat: float | None | UnsetType = UNSET
+    lon: float | None | UnsetType = UNSET
+    screens_count: int | None | UnsetType = UNSET
+    screens_count_source: str | None | UnsetType = UNSET
+    screens: list[TheaterScreen] | UnsetType = UNSET
+
+class BestSeat(msgspec.Struct):
+    suggested_seat: str | None | UnsetType = UNSET
+    user_notes: str | None | UnsetType = UNSET
+    timestamp: datetime | None | UnsetType = UNSET
+    votes: int | UnsetType = UNSET
+    source: str | UnsetType = UNSET
+
+_encoder = msgspec.json.Encoder()
+
+def encode_ndjson(items):
+    return _encoder.encode_lines(items)
+
+class StructResponse(Response):
+    """JSON response encoded by msgspec, skipping FastAPI's jsonable_encoder
+    pass. Return it directly from a route; it accepts structs, lists and dicts."""
+
+    media_type = "application/json"
+
+    def render(self, content):
+        return _encoder.encode(content)
+
+class Field:
+    def __init__(self, *columns, build=None):
+        self.columns = columns
+        self.build = build or (lambda row, key=columns[0].key: getattr(row, key))
+
+class Projection:
+    """A response shape defined once: each output field and the columns it
+    needs, so read queries select only the columns that are returned."""
+
+    def __init__(self, struct, key, **fields):
+        assert set(fields) == set(struct.__struct_fields__), struct.__name__
+        self.struct = struct
+        self.key = key
+        self.fields = fields
+
+    @property
+    def names(self):
+        return tuple(self.fields)
+
+    def columns(self, selected=None):
+        # The key column is always selected; keyset pagination seeks on it
+        columns = {self.key.key: self.key}
+        for name in selected or self.fields:
+            for column in self.fields[name].columns:
+                columns.setdefault(column.key, column)
+        return list(columns.values())
+
+    def query(self, db, selected=None):
+        return db.query(*self.columns(selected))
+
+    def serialize(self, row, selected=None):
+        return self.struct(**{name: self.fields[name].build(row) for name in selected or self.fields})
+
+def _address(row):
+    return Address(row.street, row.city, row.state, row.postcode, row.country)
+
+ADDRESS = Field(Theater.street, Theater.city, Theater.state, Theater.postcode, Theater.country, build=_address)
+
+# /theaters
+THEATER_SUMMARY = Projection(
+    TheaterSummary,
+    Theater.id,
+    id=Field(Theater.id),
+    name=Field(Theater.name),
+    brand=Field(Theater.brand),
+    city=Field(Theater.city),
+    state=Field(Theater.state),
+    country=Field(Theater.country),
+    street=Field(Theater.street),
+    postcode=Field(Theater.postcode),
+    address=ADDRESS,
+    screens_count=Field(Theater.screens_count),
+)
+
+# /theaters/by_city/{city}
+CITY_THEATER = Projection(
+    CityTheater,
+    Theater.id,
+    id=Field(Theater.id),
+    name=Field(Theater.name),
+    brand=Field(Theater.brand),
+    street=Field(Theater.street),
+    state=Field(Theater.state),
+    postcode=Field(Theater.postcode),
+    screens_count=Field(Theater.screens_count),
+)
+
+# /screens and /screens/{id}
+SCREEN = Projection(
+    ScreenSummary,
+    Screen.id,
+    id=Field(Screen.id),
+    theater_id=Field(Screen.theater_id),
+    name=Field(Screen.name),
+    screen_number=Field(Screen.screen_number),
+    is_imax=Field(Screen.is_imax),
+    best_seat=Field(Screen.best_seat),
+    notes=Field(Screen.notes),
+)
+
+# Screens nested under a theater
+THEATER_SCREEN = Projection(
+    TheaterScreen,
+    Screen.id,
+    id=Field(Screen.id),
+    name=Field(Screen.name),
+    screen_number=Field(Screen.screen_number),
+    is_imax=Field(Screen.is_imax),
+    best_seat=Field(Screen.best_seat),
+    notes=Field(Screen.notes),
+)
+
+# /theaters/{id} and /theaters/batch, built from a Theater with its screens loaded
+THEATER_DETAIL = Projection(
+    TheaterDetail,
+    Theater.id,
+    id=Field(Theater.id),
+    name=Field(Theater.name),
+    brand=Field(Theater.brand),
+    address=ADDRESS,
+    lat=Field(Theater.lat),
+    lon=Field(Theater.lon),
+    screens_count=Field(Theater.screens_count),
+    screens_count_source=Field(Theater.screens_count_source),
+    screens=Field(build=lambda t: [THEATER_SCREEN.serialize(s) for s in t.screens]),
+)
+
+# /screens/{id}/best_seat: the consensus seat and its tally, or the seat scored
+# from the layout until there are votes. Select it outer-joined on BEST_SEAT_VOTE.
+BEST_SEAT_VOTE = and_(SeatVote.screen_id == Screen.id, SeatVote.seat == Screen.best_seat)
+
+BEST_SEAT = Projection(
+    BestSeat,
+    Screen.id,
+    suggested_seat=Field(Screen.best_seat, Screen.computed_best_seat, build=lambda r: r.best_seat or r.computed_best_seat),
+    user_notes=Field(Screen.best_seat, SeatVote.last_notes, build=lambda r: r.last_notes if r.best_seat else None),
+    timestamp=Field(Screen.best_seat, SeatVote.last_voted_at, build=lambda r: r.last_voted_at if r.best_seat else None),
+    votes=Field(Screen.best_seat, SeatVote.votes, build=lambda r: (r.votes or 0) if r.best_seat else 0),
+    source=Field(Screen.best_seat, build=lambda r: "votes" if r.best_seat else "computed"),
+)
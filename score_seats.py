@@ -0,0 +1,66 @@
+import os
+from dotenv import load_dotenv
+from sqlalchemy import select, update
+from sqlalchemy.orm import sessionmaker
+from database import create_db_engine
+from models import Screen
+from seating import best_seat, parse_layout, score_seat_maps
+from catalog import bump_catalog_version
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise RuntimeError("DATABASE_URL environment variable not set. Please check your .env file.")
+
+# Screens scored per vectorized pass; bounds memory for large catalogs
+BATCH_SIZE = int(os.getenv("SCORE_BATCH_SIZE", "5000"))
+
+def score_batch(session, batch):
+    seat_maps, is_imax, ids = [], [], []
+    skipped = 0
+    for screen_id, layout, imax in batch:
+        try:
+            seat_maps.append(parse_layout(layout))
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Skipping screen {screen_id}: {e}")
+            skipped += 1
+            continue
+        ids.append(screen_id)
+        is_imax.append(imax)
+
+    updates = []
+    for screen_id, seat_map, scores in zip(ids, seat_maps, score_seat_maps(seat_maps, is_imax)):
+        label, _ = best_seat(seat_map, scores)
+        updates.append({"id": screen_id, "computed_best_seat": label})
+    if updates:
+        # Bulk UPDATE ... WHERE id = :id, executed as one executemany
+        session.execute(update(Screen), updates)
+    return len(updates), skipped
+
+def main():
+    engine = create_db_engine(DATABASE_URL)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    screens = session.execute(
+        select(Screen.id, Screen.layout_json, Screen.is_imax)
+        .where(Screen.layout_json.isnot(None))
+        .order_by(Screen.id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+
+    scored = skipped = 0
+    for batch in screens.partitions():
+        batch_scored, batch_skipped = score_batch(session, batch)
+        scored += batch_scored
+        skipped += batch_skipped
+    print(f"Scored {scored} screens, skipped {skipped} with invalid layouts")
+
+    bump_catalog_version(session)
+
+    session.commit()
+    session.close()
+
+if __name__ == "__main__":
+    main()
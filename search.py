@@ -0,0 +1,199 @@
+import os
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import timedelta
+import msgspec
+from sqlalchemy import func
+from catalog import current_catalog_version
+from database import ReadSessionLocal
+from models import Theater
+
+# Per-field weight of a matching term
+FIELD_WEIGHTS = {"name": 3.0, "brand": 2.0, "operator": 1.5, "city": 1.5, "street": 1.0}
+# How much an exact, prefix and one-typo term match is worth
+EXACT, PREFIX, TYPO = 1.0, 0.7, 0.5
+MIN_PREFIX_LENGTH = 2
+MIN_TYPO_LENGTH = 4
+# Vocabulary terms a short prefix may expand to, to keep "s" cheap
+MAX_PREFIX_EXPANSIONS = 64
+# Rows committed by a long loader transaction carry its start time, so the
+# incremental refresh re-reads this far behind the newest updated_at it saw
+REFRESH_OVERLAP = timedelta(seconds=float(os.getenv("SEARCH_REFRESH_OVERLAP_SECONDS", "600")))
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    if not text:
+        return []
+    # "Cinépolis" and "cinepolis" are the same term
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    return TOKEN_PATTERN.findall(text)
+
+def _deletes(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def _within_one_edit(a, b):
+    # Levenshtein distance <= 1, plus adjacent transpositions
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diff) == 1 or (
+            len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+        )
+    short, long = (a, b) if len(a) < len(b) else (b, a)
+    return any(long[:i] + long[i + 1:] == short for i in range(len(long)))
+
+class SearchHit(msgspec.Struct):
+    id: int
+    name: str | None
+    brand: str | None
+    street: str | None
+    city: str | None
+    state: str | None
+    score: float
+
+class SearchIndex:
+    """Inverted index over theater name, brand, operator, street and city,
+    with prefix and one-typo matching. Updated in place by apply()."""
+
+    def __init__(self, version=None):
+        self.version = version
+        self.watermark = None  # newest Theater.updated_at applied
+        self.postings = {}  # term -> {theater id: weight}
+        self.doc_terms = {}  # theater id -> {term: weight}
+        self.docs = {}  # theater id -> display fields
+        self.terms = []  # sorted vocabulary, for prefix lookups
+        self.delete_map = {}  # one-character deletion -> terms, for typo lookups
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _add_term(self, term):
+        insort(self.terms, term)
+        for variant in _deletes(term) | {term}:
+            self.delete_map.setdefault(variant, set()).add(term)
+
+    def _drop_term(self, term):
+        del self.terms[bisect_left(self.terms, term)]
+        for variant in _deletes(term) | {term}:
+            terms = self.delete_map[variant]
+            terms.discard(term)
+            if not terms:
+                del self.delete_map[variant]
+
+    def _remove(self, theater_id):
+        for term in self.doc_terms.pop(theater_id, {}):
+            docs = self.postings[term]
+            del docs[theater_id]
+            if not docs:
+                del self.postings[term]
+                self._drop_term(term)
+        self.docs.pop(theater_id, None)
+
+    def apply(self, rows):
+        """Adds or replaces theaters; rows marked missing are removed."""
+        with self._lock:
+            for row in rows:
+                self._remove(row.id)
+                if row.missing_since is not None:
+                    continue
+                weights = {}
+                for field, weight in FIELD_WEIGHTS.items():
+                    for term in tokenize(getattr(row, field)):
+                        weights[term] = max(weights.get(term, 0.0), weight)
+                for term, weight in weights.items():
+                    if term not in self.postings:
+                        self.postings[term] = {}
+                        self._add_term(term)
+                    self.postings[term][row.id] = weight
+                self.doc_terms[row.id] = weights
+                self.docs[row.id] = (row.name, row.brand, row.street, row.city, row.state)
+                if row.updated_at is not None and (self.watermark is None or row.updated_at > self.watermark):
+                    self.watermark = row.updated_at
+
+    def _candidates(self, token, prefix):
+        # term -> match factor for one query token
+        matches = {}
+        if prefix and len(token) >= MIN_PREFIX_LENGTH:
+            start = bisect_left(self.terms, token)
+            for term in self.terms[start:start + MAX_PREFIX_EXPANSIONS]:
+                if not term.startswith(token):
+                    break
+                matches[term] = PREFIX
+        # Numbers (street numbers, "Cinema 12") are never fuzzy-matched
+        if len(token) >= MIN_TYPO_LENGTH and not any(c.isdigit() for c in token):
+            for variant in _deletes(token) | {token}:
+                for term in self.delete_map.get(variant, ()):
+                    if term not in matches and _within_one_edit(token, term):
+                        matches[term] = TYPO
+        if token in self.postings:
+            matches[token] = EXACT
+        return matches
+
+    def search(self, query, limit=10):
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        with self._lock:
+            scores = None
+            for i, token in enumerate(tokens):
+                # Search-as-you-type: only the last token may still be incomplete
+                token_scores = {}
+                for term, factor in self._candidates(token, prefix=i == len(tokens) - 1).items():
+                    for theater_id, weight in self.postings[term].items():
+                        score = factor * weight
+                        if score > token_scores.get(theater_id, 0.0):
+                            token_scores[theater_id] = score
+                # Every token has to match something
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {t: s + token_scores[t] for t, s in scores.items() if t in token_scores}
+                if not scores:
+                    return []
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], len(self.docs[item[0]][0] or ""), item[0]))
+            return [SearchHit(theater_id, *self.docs[theater_id], round(score, 3)) for theater_id, score in ranked[:limit]]
+
+SEARCH_COLUMNS = (
+    Theater.id, Theater.name, Theater.brand, Theater.operator, Theater.street, Theater.city, Theater.state,
+    Theater.missing_since, Theater.updated_at,
+)
+
+def refresh_search_index(index, version):
+    db = ReadSessionLocal()
+    try:
+        query = db.query(*SEARCH_COLUMNS)
+        if index.watermark is not None:
+            query = query.filter(Theater.updated_at >= index.watermark - REFRESH_OVERLAP)
+        # Fetched before apply() takes the lock, so searches never wait on the database
+        index.apply(query.all())
+        # Deletes leave no updated_at behind; a count mismatch means start over
+        live = db.query(func.count(Theater.id)).filter(Theater.missing_since.is_(None)).scalar()
+        if len(index) != live:
+            index = SearchIndex()
+            index.apply(db.query(*SEARCH_COLUMNS).all())
+    finally:
+        db.close()
+    index.version = version
+    return index
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_search_index():
+    # Brought up to date with the rows changed since the last catalog version
+    global _index
+    version = current_catalog_version()
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = refresh_search_index(_index or SearchIndex(), version)
+            index = _index
+    return index
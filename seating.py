@@ -0,0 +1,175 @@
+"""Array-backed seat maps built from Screen.layout_json, and seat scoring.
+
+layout_json format (rows listed front to back, row A nearest the screen):
+
+    {
+      "rows": [
+        {"label": "A", "seats": "SSSS_SSSS"},
+        {"label": "B", "seats": "SSSSXSSSS"}
+      ],
+      "screen_width_m": 14.0,          # optional, estimated from the room if absent
+      "seat_width_m": 0.55,            # optional
+      "row_spacing_m": 1.0,            # optional
+      "first_row_distance_m": 4.0      # optional
+    }
+
+In "seats", S is a seat, X is a seat that can't be booked (blocked,
+wheelchair space, ...) and anything else is a gap such as an aisle. Seats
+are numbered from 1 left to right within a row, skipping gaps, so a seat is
+named like the suggestions are ("F10").
+"""
+import numpy as np
+
+SEAT_WIDTH_M = 0.55
+ROW_SPACING_M = 1.0
+FIRST_ROW_DISTANCE_M = 4.0
+# Preferred horizontal field of view: THX recommends ~40 degrees; IMAX
+# theaters are designed for the screen to fill much more of it
+TARGET_FOV_DEG = 40.0
+IMAX_TARGET_FOV_DEG = 70.0
+FOV_TOLERANCE_DEG = 15.0
+# Looking up at the top of the screen beyond this strains the neck
+MAX_COMFORT_ELEVATION_DEG = 30.0
+SCREEN_ASPECT = 2.39
+IMAX_SCREEN_ASPECT = 1.43
+SCREEN_BOTTOM_ABOVE_EYE_M = 0.5
+
+CENTER_WEIGHT = 0.35
+FOV_WEIGHT = 0.45
+ELEVATION_WEIGHT = 0.20
+
+class SeatMap:
+    def __init__(self, row_labels, is_seat, available, seat_numbers,
+                 screen_width_m=None, seat_width_m=SEAT_WIDTH_M,
+                 row_spacing_m=ROW_SPACING_M, first_row_distance_m=FIRST_ROW_DISTANCE_M):
+        self.row_labels = row_labels
+        self.is_seat = is_seat              # (rows, cols) bool
+        self.available = available          # (rows, cols) bool, subset of is_seat
+        self.seat_numbers = seat_numbers    # (rows, cols) int, 0 for gaps
+        self.screen_width_m = screen_width_m
+        self.seat_width_m = seat_width_m
+        self.row_spacing_m = row_spacing_m
+        self.first_row_distance_m = first_row_distance_m
+
+    @property
+    def shape(self):
+        return self.is_seat.shape
+
+    def seat_label(self, row, col):
+        return f"{self.row_labels[row]}{self.seat_numbers[row, col]}"
+
+def parse_layout(layout):
+    rows = layout.get("rows") if isinstance(layout, dict) else None
+    if not rows:
+        raise ValueError("layout_json has no rows")
+    width = max(len(row.get("seats", "")) for row in rows)
+    if width == 0:
+        raise ValueError("layout_json rows have no seats")
+
+    codes = np.full((len(rows), width), "_", dtype="<U1")
+    for r, row in enumerate(rows):
+        seats = row.get("seats", "")
+        codes[r, :len(seats)] = list(seats.upper())
+    is_seat = (codes == "S") | (codes == "X")
+    available = codes == "S"
+    seat_numbers = np.where(is_seat, np.cumsum(is_seat, axis=1), 0)
+
+    return SeatMap(
+        [str(row.get("label", "")) for row in rows],
+        is_seat,
+        available,
+        seat_numbers,
+        screen_width_m=layout.get("screen_width_m"),
+        seat_width_m=layout.get("seat_width_m", SEAT_WIDTH_M),
+        row_spacing_m=layout.get("row_spacing_m", ROW_SPACING_M),
+        first_row_distance_m=layout.get("first_row_distance_m", FIRST_ROW_DISTANCE_M),
+    )
+
+def score_seat_maps(seat_maps, is_imax):
+    """Scores every seat of every map in one vectorized pass.
+
+    Returns one float grid per map, matching its shape, with NaN where there
+    is no bookable seat. Scores are in [0, 1], higher is better.
+    """
+    if not seat_maps:
+        return []
+    n = len(seat_maps)
+    rows = max(m.shape[0] for m in seat_maps)
+    cols = max(m.shape[1] for m in seat_maps)
+
+    available = np.zeros((n, rows, cols), dtype=bool)
+    for i, m in enumerate(seat_maps):
+        available[i, :m.shape[0], :m.shape[1]] = m.available
+
+    # Per-screen parameters, broadcast as (n, 1, 1)
+    def column(values):
+        return np.asarray(values, dtype=np.float64).reshape(n, 1, 1)
+
+    imax = column([bool(x) for x in is_imax]).astype(bool)
+    seat_width = column([m.seat_width_m for m in seat_maps])
+    row_spacing = column([m.row_spacing_m for m in seat_maps])
+    first_row = column([m.first_row_distance_m for m in seat_maps])
+    map_cols = column([m.shape[1] for m in seat_maps])
+    room_width = map_cols * seat_width
+    # Without a measured width assume the screen spans most of the room
+    estimated = np.where(imax, 0.9, 0.6) * room_width
+    screen_width = column([m.screen_width_m or np.nan for m in seat_maps])
+    screen_width = np.where(np.isnan(screen_width), estimated, screen_width)
+    screen_height = screen_width / np.where(imax, IMAX_SCREEN_ASPECT, SCREEN_ASPECT)
+    target_fov = np.where(imax, IMAX_TARGET_FOV_DEG, TARGET_FOV_DEG)
+
+    # Seat positions: x across the room from the screen centerline, y away from the screen
+    col_index = np.arange(cols, dtype=np.float64).reshape(1, 1, cols)
+    row_index = np.arange(rows, dtype=np.float64).reshape(1, rows, 1)
+    x = (col_index - (map_cols - 1) / 2) * seat_width
+    y = first_row + row_index * row_spacing
+
+    center_score = 1.0 - np.clip(np.abs(x) / (room_width / 2), 0.0, 1.0)
+
+    # Horizontal field of view from each seat to the screen edges
+    fov = np.degrees(np.arctan((screen_width / 2 - x) / y) + np.arctan((screen_width / 2 + x) / y))
+    fov_score = np.exp(-(((fov - target_fov) / FOV_TOLERANCE_DEG) ** 2))
+
+    elevation = np.degrees(np.arctan((SCREEN_BOTTOM_ABOVE_EYE_M + screen_height) / y))
+    elevation_score = np.clip(
+        1.0 - np.maximum(elevation - MAX_COMFORT_ELEVATION_DEG, 0.0) / MAX_COMFORT_ELEVATION_DEG, 0.0, 1.0
+    )
+
+    scores = CENTER_WEIGHT * center_score + FOV_WEIGHT * fov_score + ELEVATION_WEIGHT * elevation_score
+    scores = np.where(available, scores, np.nan)
+    return [scores[i, :m.shape[0], :m.shape[1]] for i, m in enumerate(seat_maps)]
+
+def best_seat(seat_map, scores):
+    if np.all(np.isnan(scores)):
+        return None, None
+    row, col = np.unravel_index(np.nanargmax(scores), scores.shape)
+    return seat_map.seat_label(row, col), float(scores[row, col])
+
+def best_block(seat_map, scores, size):
+    """Highest-scoring run of `size` adjacent bookable seats within a row.
+
+    Uses prefix sums over each row, so every window is checked in O(1) and the
+    whole search is linear in the number of seats. Returns None if no row has
+    such a run.
+    """
+    rows, cols = scores.shape
+    if size < 1 or size > cols:
+        return None
+    bookable = ~np.isnan(scores)
+    zeros = np.zeros((rows, 1))
+    score_sums = np.hstack([zeros, np.cumsum(np.where(bookable, scores, 0.0), axis=1)])
+    gap_counts = np.hstack([zeros, np.cumsum(~bookable, axis=1)])
+
+    # Window starting at column c covers columns c .. c + size - 1
+    window_scores = score_sums[:, size:] - score_sums[:, :-size]
+    window_gaps = gap_counts[:, size:] - gap_counts[:, :-size]
+    window_scores = np.where(window_gaps == 0, window_scores, -np.inf)
+    if np.all(np.isneginf(window_scores)):
+        return None
+
+    row, start = np.unravel_index(np.argmax(window_scores), window_scores.shape)
+    return {
+        "row": seat_map.row_labels[row],
+        "seats": [seat_map.seat_label(row, col) for col in range(start, start + size)],
+        "score": round(float(window_scores[row, start]) / size, 4),
+    }
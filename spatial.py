@@ -0,0 +1,123 @@
+import math
+import threading
+import numpy as np
+from catalog import current_catalog_version
+from database import ReadSessionLocal
+from models import Theater
+
+EARTH_RADIUS_KM = 6371.0088
+# Grid cell size in degrees (~28 km of latitude)
+CELL_DEGREES = 0.25
+LON_CELLS = int(360 / CELL_DEGREES)
+
+def _cell(lat, lon):
+    return int(math.floor(lat / CELL_DEGREES)), int(math.floor(lon / CELL_DEGREES))
+
+class TheaterIndex:
+    """Uniform lat/lon grid over theater coordinates for k-nearest lookups."""
+
+    def __init__(self, ids, lats, lons, payloads, version):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.lat_rad = np.radians(self.lats)
+        self.lon_rad = np.radians(self.lons)
+        self.payloads = payloads
+        self.version = version
+
+        cells = {}
+        for i, (lat, lon) in enumerate(zip(self.lats, self.lons)):
+            cells.setdefault(_cell(lat, lon), []).append(i)
+        self.cells = {key: np.asarray(idx, dtype=np.int64) for key, idx in cells.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _candidates(self, lat, lon, radius_km):
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        cos_lat = math.cos(math.radians(lat))
+        # Near the poles (or for huge radii) every longitude is in range
+        if cos_lat < 1e-6 or dlat / cos_lat >= 180:
+            lon_cells = range(LON_CELLS)
+        else:
+            dlon = dlat / cos_lat
+            lo, hi = _cell(lat, lon - dlon)[1], _cell(lat, lon + dlon)[1]
+            lon_cells = [c % LON_CELLS for c in range(lo, hi + 1)]
+        row_lo, row_hi = _cell(lat - dlat, lon)[0], _cell(lat + dlat, lon)[0]
+
+        found = []
+        for row in range(row_lo, row_hi + 1):
+            for col in lon_cells:
+                # Cell columns are stored unwrapped, in [-LON_CELLS/2, LON_CELLS/2)
+                if col >= LON_CELLS // 2:
+                    col -= LON_CELLS
+                idx = self.cells.get((row, col))
+                if idx is not None:
+                    found.append(idx)
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(found)
+
+    def nearest(self, lat, lon, radius_km, k):
+        candidates = self._candidates(lat, lon, radius_km)
+        if not len(candidates):
+            return []
+
+        # Haversine distance from the query point to every candidate
+        lat0, lon0 = math.radians(lat), math.radians(lon)
+        dlat = self.lat_rad[candidates] - lat0
+        dlon = self.lon_rad[candidates] - lon0
+        a = np.sin(dlat / 2) ** 2 + math.cos(lat0) * np.cos(self.lat_rad[candidates]) * np.sin(dlon / 2) ** 2
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+        within = distances <= radius_km
+        candidates, distances = candidates[within], distances[within]
+        if len(candidates) > k:
+            top = np.argpartition(distances, k - 1)[:k]
+            candidates, distances = candidates[top], distances[top]
+        order = np.argsort(distances, kind="stable")
+        return [(self.payloads[candidates[i]], float(distances[i])) for i in order]
+
+def build_theater_index(db, version):
+    rows = db.query(
+        Theater.id, Theater.name, Theater.brand, Theater.city, Theater.state, Theater.lat, Theater.lon
+    ).filter(Theater.lat.isnot(None), Theater.lon.isnot(None), Theater.missing_since.is_(None)).all()
+    payloads = [
+        {
+            "id": r.id,
+            "name": r.name,
+            "brand": r.brand,
+            "city": r.city,
+            "state": r.state,
+            "lat": r.lat,
+            "lon": r.lon,
+        }
+        for r in rows
+    ]
+    return TheaterIndex([r.id for r in rows], [r.lat for r in rows], [r.lon for r in rows], payloads, version)
+
+_index = None
+_index_lock = threading.Lock()
+
+def refresh_theater_index(version=None):
+    global _index
+    with _index_lock:
+        if version is None:
+            version = current_catalog_version(force=True)
+        elif _index is not None and _index.version == version:
+            # Another request rebuilt it while we waited for the lock
+            return _index
+        db = ReadSessionLocal()
+        try:
+            _index = build_theater_index(db, version)
+        finally:
+            db.close()
+        return _index
+
+def get_theater_index():
+    # Rebuilt lazily when the catalog version moves (e.g. after a loader run)
+    version = current_catalog_version()
+    index = _index
+    if index is None or index.version != version:
+        index = refresh_theater_index(version)
+    return index
@@ -0,0 +1,59 @@
+"""Cold-start timing, from process start to the first successful response.
+
+With min_machines_running = 0 on Fly, the request that wakes a machine waits
+for all of it, so the breakdown is printed once and kept as gauges."""
+import time
+from contextlib import contextmanager
+import psutil
+from prometheus_client import Gauge
+
+STARTUP_SECONDS = Gauge("startup_phase_seconds", "Cold start breakdown of this process", ["phase"])
+
+class StartupReport:
+    def __init__(self):
+        # Includes interpreter and uvicorn startup, not just our imports
+        self.process_start = psutil.Process().create_time()
+        self.phases = {}
+        self._last = self.process_start
+        self.reported = False
+
+    def mark(self, phase):
+        # Time since the previous mark (or process start) is charged to phase
+        now = time.time()
+        self.phases[phase] = now - self._last
+        self._last = now
+
+    @contextmanager
+    def phase(self, name):
+        start = time.time()
+        yield
+        self._last = time.time()
+        self.phases[name] = self._last - start
+
+    def first_response(self, path):
+        if self.reported:
+            return
+        self.reported = True
+        self.mark("until_first_response")
+        self.phases["total"] = self._last - self.process_start
+        for phase, seconds in self.phases.items():
+            STARTUP_SECONDS.labels(phase).set(seconds)
+        breakdown = ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.phases.items() if phase != "total")
+        print(f"Cold start: first successful response ({path}) {self.phases['total'] * 1000:.0f} ms after process start ({breakdown})", flush=True)
+
+startup_report = StartupReport()
+
+class StartupMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or startup_report.reported:
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            await send(message)
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                startup_report.first_response(scope["path"])
+
+        await self.app(scope, receive, send_wrapper)
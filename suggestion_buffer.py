@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import threading
+import time
+from catalog import current_catalog_versions
+from consensus import store_suggestions
+from models import Screen
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND_ENABLED = os.getenv("SUGGESTION_WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+FLUSH_SIZE = int(os.getenv("SUGGESTION_FLUSH_SIZE", "500"))
+FLUSH_SECONDS = float(os.getenv("SUGGESTION_FLUSH_SECONDS", "1.0"))
+# Queued plus retrying suggestions; past this the route writes synchronously
+MAX_PENDING = int(os.getenv("SUGGESTION_MAX_PENDING", "20000"))
+# A failed batch is retried after 1s, 2s, 4s, ... (at most RETRY_MAX_SECONDS)
+# and, once it has failed MAX_ATTEMPTS times, written one row at a time
+MAX_ATTEMPTS = int(os.getenv("SUGGESTION_MAX_ATTEMPTS", "5"))
+RETRY_SECONDS = float(os.getenv("SUGGESTION_RETRY_SECONDS", "1.0"))
+RETRY_MAX_SECONDS = float(os.getenv("SUGGESTION_RETRY_MAX_SECONDS", "60"))
+
+class _Retry:
+    def __init__(self, batch, attempts, due):
+        self.batch = batch
+        self.attempts = attempts
+        self.due = due
+
+class SuggestionBuffer:
+    """Queues validated suggestions in-process and writes them as multi-row
+    INSERTs once FLUSH_SIZE are pending or FLUSH_SECONDS have passed.
+
+    A batch that fails is retried on its own with backoff, so it never holds
+    up suggestions queued after it. After MAX_ATTEMPTS failures its rows are
+    written one at a time, and any row that still fails is logged in full
+    (logger "suggestion_buffer", level ERROR) and dropped.
+    """
+
+    def __init__(self, session_factory, flush_size=FLUSH_SIZE, flush_seconds=FLUSH_SECONDS,
+                 max_pending=MAX_PENDING, max_attempts=MAX_ATTEMPTS):
+        self.session_factory = session_factory
+        self.flush_size = flush_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._pending = []
+        self._retries = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="suggestion-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # Drains whatever is still queued before the process exits: retries
+        # ignore their backoff, and a batch that fails goes row by row
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush(final=True)
+
+    def add(self, suggestion):
+        # False when the buffer is full; the caller stores it itself
+        with self._lock:
+            if self._count() >= self.max_pending:
+                return False
+            self._pending.append(suggestion)
+            full = len(self._pending) >= self.flush_size
+        if full:
+            self._wake.set()
+        return True
+
+    def pending(self):
+        with self._lock:
+            return self._count()
+
+    def _count(self):
+        # Caller holds self._lock
+        return len(self._pending) + sum(len(retry.batch) for retry in self._retries)
+
+    def flush(self, final=False):
+        now = time.monotonic()
+        with self._lock:
+            batch, self._pending = self._pending, []
+            due = [retry for retry in self._retries if final or retry.due <= now]
+            self._retries = [retry for retry in self._retries if not (final or retry.due <= now)]
+        if batch:
+            due.insert(0, _Retry(batch, 0, now))
+        stored = 0
+        for retry in due:
+            stored += self._write(retry, final)
+        if stored:
+            current_catalog_versions(force=True)
+        return stored
+
+    def _write(self, retry, final):
+        try:
+            return self._store(retry.batch)
+        except Exception:
+            attempts = retry.attempts + 1
+            if attempts < self.max_attempts and not final:
+                delay = min(RETRY_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+                # Already acknowledged with a 202, so keep them for a retry
+                with self._lock:
+                    self._retries.append(_Retry(retry.batch, attempts, time.monotonic() + delay))
+                logger.exception(
+                    "Flush of %d buffered suggestions failed (attempt %d of %d); retrying in %.0fs",
+                    len(retry.batch), attempts, self.max_attempts, delay,
+                )
+                return 0
+            logger.exception("Flush of %d buffered suggestions failed; storing them one at a time", len(retry.batch))
+        return self._store_rows(retry.batch)
+
+    def _store_rows(self, batch):
+        stored = 0
+        for suggestion in batch:
+            try:
+                stored += self._store([suggestion])
+            except Exception:
+                logger.exception("Dropping buffered suggestion that could not be stored: %s", json.dumps(suggestion, default=str))
+        return stored
+
+    def _store(self, batch):
+        db = self.session_factory()
+        try:
+            # Screens can be deleted (populate_screens.py) after the route
+            # validated them; only those suggestions are dropped
+            screen_ids = {s["screen_id"] for s in batch}
+            found = {row.id for row in db.query(Screen.id).filter(Screen.id.in_(screen_ids))}
+            stored = [s for s in batch if s["screen_id"] in found]
+            if len(stored) < len(batch):
+                logger.warning(
+                    "Dropping %d buffered suggestions for deleted screens %s",
+                    len(batch) - len(stored), sorted(screen_ids - found),
+                )
+            store_suggestions(db, stored)
+            db.commit()
+            return len(stored)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()